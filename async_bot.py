@@ -0,0 +1,675 @@
+"""
+Núcleo asyncio del Alpha Arena Trading Bot
+Mercado, IA, órdenes, notificaciones, Telegram y mark prices son tareas de un
+único event loop (AsyncClient de python-binance + aiohttp), con timeouts y
+cancelación estructurada (asyncio.TaskGroup). El trabajo bloqueante (indicadores,
+checkpoint, grabación) va a asyncio.to_thread y recibe copias del estado, no las
+estructuras que el loop sigue modificando.
+"""
+
+import copy
+import json
+import time
+import signal
+import asyncio
+import logging
+from typing import Dict, List, Optional
+import aiohttp
+from binance import AsyncClient, BinanceSocketManager
+from decisions import parse_decision
+from config import (
+    PROCESS_START, BINANCE_API_KEY, BINANCE_SECRET_KEY, OPENROUTER_API_KEY,
+    TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, TRADING_PAIRS, LOOP_INTERVAL, DEFAULT_LEVERAGE, MAX_LEVERAGE,
+    WARM_START, SCREENER_ENABLED, SCREENER_UNIVERSE_SIZE, MARKET_DATA_WORKERS, MARKET_FEATURES,
+    RISK_ACTION, RISK_FEED, RISK_POLL_INTERVAL, RISK_ACCOUNT_SYNC, EXECUTION_STYLE, EXECUTION_TIMEOUT, EXECUTION_SLICE_USD, EXECUTION_POLL
+)
+from main import (
+    TradingBot, OPENROUTER_URL, TELEGRAM_HELP,
+    SIDE_BUY, SIDE_SELL, ORDER_TYPE_MARKET, FUTURE_ORDER_TYPE_TAKE_PROFIT_MARKET, FUTURE_ORDER_TYPE_STOP_MARKET
+)
+from screener import rank_universe
+from execution import FINAL_STATUSES, child_quantities, order_fill, fill_report, describe_report
+from features import (
+    FUNDING_TTL, BOOK_TTL, OPEN_INTEREST_TTL,
+    parse_premium_index, parse_book_ticker, add_features, add_open_interest
+)
+
+logger = logging.getLogger(__name__)
+
+IO_TIMEOUT = 15  # Segundos máximos por llamada a Binance / Telegram
+LLM_TIMEOUT = 60  # Segundos máximos para DeepSeek
+
+
+class AsyncTradingBot(TradingBot):
+    """TradingBot sobre asyncio: reutiliza la lógica pura de TradingBot y reemplaza todo el I/O"""
+
+    def __init__(self):
+        # Sin I/O aquí: la conexión se abre en start(), dentro del event loop
+        self._init_state()
+        self.trade_lock = asyncio.Lock()
+        self.last_stream_mark = 0.0
+        self.client: Optional[AsyncClient] = None
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.tasks: Optional[asyncio.TaskGroup] = None
+
+    async def _io(self, awaitable, timeout: float = IO_TIMEOUT):
+        """Espera una operación de I/O con timeout"""
+        async with asyncio.timeout(timeout):
+            return await awaitable
+
+    async def _timed_async(self, phase: str, awaitable):
+        start = time.time()
+        try:
+            return await awaitable
+        finally:
+            self.startup_timings[phase] = time.time() - start
+
+    def _spawn(self, coro):
+        """Lanza una tarea hija del TaskGroup; sus errores se registran sin tumbar al resto"""
+        async def guarded():
+            try:
+                await coro
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Error en tarea: {e}")
+        return self.tasks.create_task(guarded())
+
+    # ============== ARRANQUE ==============
+
+    async def start(self):
+        """Conecta con Binance y prepara el estado (leverage, warm start o cierre de posiciones)"""
+        self.session = aiohttp.ClientSession()
+        self.client = await self._timed_async('client', self._io(
+            AsyncClient.create(BINANCE_API_KEY, BINANCE_SECRET_KEY, testnet=True)
+        ))
+        logger.info("🤖 Trading Bot iniciado - Modo Alpha Arena (asyncio)")
+
+        if WARM_START:
+            # Reanudar sin tocar las posiciones abiertas; sin checkpoint se adoptan tal cual del exchange
+            state = self._load_checkpoint()
+            positions = await self._timed_async('warm_start', self._io(self.client.futures_position_information()))
+            self._warm_start(state, positions)
+            if self.starting_balance is None:
+                account = await self._io(self.client.futures_account())
+                self.starting_balance = float(account['totalWalletBalance'])
+            await self._timed_async('leverage', self._setup_leverage(skip=set(self.positions)))
+        else:
+            # Cerrar posiciones y configurar leverage a la vez
+            await asyncio.gather(
+                self._timed_async('close_positions', self._close_all_positions()),
+                self._timed_async('leverage', self._setup_leverage())
+            )
+            account = await self._timed_async('account', self._io(self.client.futures_account()))
+            self.starting_balance = float(account['totalWalletBalance'])
+            logger.info(f"💰 Balance inicial: ${self.starting_balance:.2f}")
+
+        self._log_startup()
+
+    async def close(self):
+        """Checkpoint final y cierre de conexiones"""
+        await asyncio.to_thread(self._checkpoint, self._checkpoint_state())
+        if self.client:
+            await self.client.close_connection()
+        if self.session:
+            await self.session.close()
+        if self.indicator_pool:
+            self.indicator_pool.shutdown()
+
+    async def _setup_leverage(self, skip: Optional[set] = None):
+        """Configura leverage para todos los pares en paralelo"""
+        pairs = [pair for pair in TRADING_PAIRS if not skip or pair not in skip]
+        await asyncio.gather(*(self._set_pair_leverage(pair) for pair in pairs))
+
+    async def _set_pair_leverage(self, pair: str):
+        try:
+            await self._io(self.client.futures_change_leverage(symbol=pair, leverage=DEFAULT_LEVERAGE))
+            logger.info(f"✅ Leverage {DEFAULT_LEVERAGE}x configurado para {pair}")
+        except Exception as e:
+            logger.warning(f"⚠️ Error configurando leverage para {pair}: {e}")
+
+    async def _close_all_positions(self):
+        """Cierra todas las posiciones abiertas (al iniciar o por límite de riesgo)"""
+        try:
+            positions = await self._io(self.client.futures_position_information())
+            await asyncio.gather(*(
+                self._io(self.client.futures_create_order(
+                    symbol=pos['symbol'],
+                    side=SIDE_SELL if float(pos['positionAmt']) > 0 else SIDE_BUY,
+                    type=ORDER_TYPE_MARKET,
+                    quantity=abs(float(pos['positionAmt'])),
+                    reduceOnly=True
+                ))
+                for pos in positions if float(pos['positionAmt']) != 0
+            ))
+            logger.info("✅ Todas las posiciones cerradas")
+        except Exception as e:
+            logger.warning(f"⚠️ Error cerrando posiciones: {e}")
+
+    # ============== MERCADO Y CUENTA ==============
+
+    async def get_market_data(self, pairs: Optional[List[str]] = None) -> Dict[str, dict]:
+        """Velas y precios en paralelo; indicadores fuera del event loop"""
+        pairs = pairs or TRADING_PAIRS
+        try:
+            tickers = await self._io(self.client.futures_symbol_ticker())
+            prices = {t['symbol']: float(t['price']) for t in tickers}
+        except Exception as e:
+            logger.error(f"❌ Error obteniendo precios: {e}")
+            return {pair: None for pair in pairs}
+
+        limit = asyncio.Semaphore(MARKET_DATA_WORKERS)
+
+        async def fetch_klines(pair: str):
+            async with limit:
+                return await self._io(self.client.futures_klines(symbol=pair, interval='15m', limit=100))
+
+        # Funding y order book de todos los símbolos, en paralelo con las velas
+        features_task = asyncio.ensure_future(self._bulk_features()) if MARKET_FEATURES else None
+        results = await asyncio.gather(*(fetch_klines(pair) for pair in pairs), return_exceptions=True)
+        klines_by_pair = {}
+        for pair, result in zip(pairs, results):
+            if isinstance(result, BaseException) or pair not in prices:
+                logger.error(f"❌ Error obteniendo datos de {pair}: {result if isinstance(result, BaseException) else 'sin precio en el ticker'}")
+                continue
+            klines_by_pair[pair] = result
+
+        # pandas/ta es CPU: se ejecuta en un hilo para no bloquear el resto de tareas
+        market_data = await asyncio.to_thread(self._build_market_data, pairs, prices, klines_by_pair)
+        if features_task:
+            try:
+                add_features(market_data, *await features_task)
+            except Exception as e:
+                logger.warning(f"⚠️ Error obteniendo funding/order book: {e!r}")
+        return market_data
+
+    async def _bulk_features(self) -> tuple:
+        funding = self.feature_cache.get('funding', FUNDING_TTL)
+        book = self.feature_cache.get('book', BOOK_TTL)
+        premium_index, book_ticker = await asyncio.gather(
+            self._io(self.client.futures_mark_price()) if funding is None else asyncio.sleep(0),
+            self._io(self.client.futures_orderbook_ticker()) if book is None else asyncio.sleep(0)
+        )
+        if funding is None:
+            funding = parse_premium_index(premium_index)
+            self.feature_cache.put('funding', funding)
+        if book is None:
+            book = parse_book_ticker(book_ticker)
+            self.feature_cache.put('book', book)
+        return funding, book
+
+    async def add_open_interest(self, market_data: dict):
+        pairs = [pair for pair, data in market_data.items() if data]
+        stale = [pair for pair in pairs if self.feature_cache.get(('open_interest', pair), OPEN_INTEREST_TTL) is None]
+        results = await asyncio.gather(
+            *(self._io(self.client.futures_open_interest(symbol=pair)) for pair in stale), return_exceptions=True
+        )
+        for pair, result in zip(stale, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"⚠️ Error obteniendo open interest de {pair}: {result!r}")
+                continue
+            self.feature_cache.put(('open_interest', pair), float(result['openInterest']))
+        open_interest = {pair: self.feature_cache.get(('open_interest', pair), OPEN_INTEREST_TTL) for pair in pairs}
+        add_open_interest(market_data, {pair: oi for pair, oi in open_interest.items() if oi is not None})
+
+    async def _load_exchange_info(self):
+        if self.symbol_filters:
+            return
+        info = await self._io(self.client.futures_exchange_info())
+        self._parse_exchange_info(info)
+
+    async def screen_universe(self) -> Dict[str, dict]:
+        await self._load_exchange_info()
+        tickers = await self._io(self.client.futures_ticker())
+        universe = rank_universe(tickers, self.symbol_filters, SCREENER_UNIVERSE_SIZE)
+        logger.info(f"🔎 Screener: universo de {len(universe)} pares")
+        return universe
+
+    async def get_account_info(self) -> Optional[dict]:
+        try:
+            account, positions = await asyncio.gather(
+                self._io(self.client.futures_account()),
+                self._io(self.client.futures_position_information())
+            )
+            return self._parse_account(account, positions)
+        except Exception as e:
+            logger.error(f"❌ Error obteniendo cuenta: {e}")
+            return None
+
+    # ============== IA ==============
+
+    async def query_deepseek(self, prompt: str) -> Optional[dict]:
+        """Consulta DeepSeek via OpenRouter (aiohttp)"""
+        content = ''
+        self.last_llm_response = ''
+        try:
+            request = self._deepseek_request(prompt)
+            self._log_payload(request['payload'])
+            start_time = time.time()
+
+            async with self.session.post(
+                OPENROUTER_URL, headers=request['headers'], json=request['payload'],
+                timeout=aiohttp.ClientTimeout(total=LLM_TIMEOUT)
+            ) as response:
+                logger.info(f"⏱️ DeepSeek response time: {time.time() - start_time:.2f}s")
+                if response.status != 200:
+                    logger.error(f"❌ Error OpenRouter: {response.status} - {await response.text()}")
+                    return None
+                result = await response.json()
+
+            content = result['choices'][0]['message']['content']
+            self.last_llm_response = content
+            decision = parse_decision(content)
+            logger.info(f"🧠 DeepSeek decisión: {decision}")
+            return decision
+
+        except json.JSONDecodeError as e:
+            logger.error(f"❌ Error parseando respuesta JSON: {e}")
+            logger.error(f"Respuesta raw: {content[:500]}")
+            return None
+        except Exception as e:
+            logger.error(f"❌ Error consultando DeepSeek: {e!r}")
+            return None
+
+    # ============== ÓRDENES ==============
+
+    async def check_invalidations(self, market_data: dict):
+        for symbol, condition in self._triggered_invalidations(market_data):
+            await self.execute_trade(self._invalidation_close(symbol, condition))
+
+    async def execute_trade(self, decision: dict) -> bool:
+        """Ejecuta la orden basada en la decisión de DeepSeek"""
+        try:
+            trade = self._parse_trade(decision)
+            signal_name, symbol = trade['signal'], trade['symbol']
+
+            if self._skip_trade(trade):
+                return True
+
+            if signal_name in ['buy_to_enter', 'sell_to_enter']:
+                account, ticker = await asyncio.gather(
+                    self.get_account_info(),
+                    self._io(self.client.futures_symbol_ticker(symbol=symbol))
+                )
+                current_price = float(ticker['price'])
+                quantity = self._entry_quantity(trade, account['available'], current_price)
+
+                if quantity <= 0:
+                    logger.warning(f"⚠️ Cantidad calculada es 0 para {symbol}")
+                    return False
+
+                side = SIDE_BUY if signal_name == 'buy_to_enter' else SIDE_SELL
+                action = 'OPEN_LONG' if signal_name == 'buy_to_enter' else 'OPEN_SHORT'
+
+                leverage = min(trade['leverage'], MAX_LEVERAGE)
+                await self._io(self.client.futures_change_leverage(symbol=symbol, leverage=leverage))
+                execution = await self._execute_order(symbol, side, quantity, current_price)
+                quantity = execution['filled_qty']
+                if quantity <= 0:
+                    logger.warning(f"⚠️ Orden sin ejecutar para {symbol}")
+                    return False
+
+                msg = self._record_open(trade, action, execution['avg_price'] or current_price, quantity, leverage, execution)
+                if trade['tp_price'] and trade['sl_price']:
+                    await self._set_tp_sl(symbol, action, quantity, trade['tp_price'], trade['sl_price'])
+                self._spawn(self._notify(msg))
+                return True
+
+            elif signal_name == 'close':
+                positions = await self._io(self.client.futures_position_information(symbol=symbol))
+                for pos in positions:
+                    pos_amt = float(pos['positionAmt'])
+                    if pos_amt != 0:
+                        execution = await self._execute_order(
+                            symbol, SIDE_SELL if pos_amt > 0 else SIDE_BUY, abs(pos_amt), reduce_only=True
+                        )
+                        filled = execution['filled_qty']
+                        remaining = self._round_quantity(symbol, abs(pos_amt) - filled)
+                        msg = self._record_close(symbol, trade['justification'], float(pos['entryPrice']), filled, execution, remaining)
+                        self._spawn(self._notify(msg))
+                        return True
+
+                logger.warning(f"⚠️ No hay posición abierta en {symbol}")
+                return False
+
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Error ejecutando trade: {e!r}")
+            self._spawn(self._notify(f"❌ Error ejecutando trade: {e}"))
+            return False
+
+    async def _execute_order(self, symbol: str, side: str, quantity: float,
+                             decision_price: Optional[float] = None, reduce_only: bool = False) -> dict:
+        """Ejecuta `quantity` con EXECUTION_STYLE (troceada si supera EXECUTION_SLICE_USD) y devuelve el reporte"""
+        started = time.time()
+        if decision_price is None:
+            book = await self._io(self.client.futures_orderbook_ticker(symbol=symbol))
+            decision_price = (float(book['bidPrice']) + float(book['askPrice'])) / 2
+
+        children = child_quantities(quantity, decision_price, EXECUTION_SLICE_USD, self._quantity_decimals(symbol))
+        fills, error = [], None
+        for child in children:
+            try:
+                await self._execute_child(symbol, side, child, reduce_only, fills)
+            except Exception as e:
+                # Lo ya llenado se reporta igual: la posición y el TP/SL se registran con esa cantidad
+                logger.error(f"❌ Error en orden de {symbol} tras {len(fills)} fill(s): {e!r}")
+                error = e
+                break
+        if error and not fills:
+            raise error
+
+        report = fill_report(EXECUTION_STYLE, side, decision_price, fills, (time.time() - started) * 1000,
+                             len(children), repr(error) if error else None)
+        logger.info(f"{describe_report(report)} ({symbol} {side} {report['filled_qty']} @ {report['avg_price']})")
+        return report
+
+    async def _execute_child(self, symbol: str, side: str, quantity: float, reduce_only: bool, fills: List[tuple]):
+        remaining = quantity
+        if EXECUTION_STYLE != 'market':
+            book = await self._io(self.client.futures_orderbook_ticker(symbol=symbol))
+            order = await self._io(self.client.futures_create_order(**self._order_request(
+                symbol, side, quantity, reduce_only, float(book['bidPrice']), float(book['askPrice'])
+            )))
+            if EXECUTION_STYLE == 'post_only':
+                order = await self._await_limit_order(symbol, order)
+            executed, avg_price = order_fill(order)
+            if executed:
+                fills.append((executed, avg_price, 'maker' if EXECUTION_STYLE == 'post_only' else 'taker'))
+            remaining = self._round_quantity(symbol, quantity - executed)
+
+        if remaining > 0:
+            order = await self._io(self.client.futures_create_order(
+                **self._order_request(symbol, side, remaining, reduce_only, market=True)
+            ))
+            if order.get('status') != 'FILLED':
+                order = await self._io(self.client.futures_get_order(symbol=symbol, orderId=order['orderId']))
+            executed, avg_price = order_fill(order)
+            if executed:
+                fills.append((executed, avg_price, 'taker'))
+
+    async def _await_limit_order(self, symbol: str, order: dict) -> dict:
+        """Espera hasta EXECUTION_TIMEOUT a la orden post-only y cancela el resto"""
+        deadline = time.time() + EXECUTION_TIMEOUT
+        while order['status'] not in FINAL_STATUSES and time.time() < deadline:
+            await asyncio.sleep(EXECUTION_POLL)
+            order = await self._io(self.client.futures_get_order(symbol=symbol, orderId=order['orderId']))
+        if order['status'] not in FINAL_STATUSES:
+            try:
+                order = await self._io(self.client.futures_cancel_order(symbol=symbol, orderId=order['orderId']))
+            except Exception:
+                # Se llenó entre la última consulta y la cancelación
+                order = await self._io(self.client.futures_get_order(symbol=symbol, orderId=order['orderId']))
+        return order
+
+    async def _set_tp_sl(self, symbol: str, action: str, quantity: float, tp_price: float, sl_price: float):
+        """Take Profit y Stop Loss en paralelo"""
+        exit_side = SIDE_SELL if action in ['OPEN_LONG', 'buy_to_enter'] else SIDE_BUY
+        try:
+            await asyncio.gather(
+                self._io(self.client.futures_create_order(
+                    symbol=symbol,
+                    side=exit_side,
+                    type=FUTURE_ORDER_TYPE_TAKE_PROFIT_MARKET,
+                    stopPrice=self._round_price(symbol, tp_price),
+                    quantity=quantity,
+                    reduceOnly=True
+                )),
+                self._io(self.client.futures_create_order(
+                    symbol=symbol,
+                    side=exit_side,
+                    type=FUTURE_ORDER_TYPE_STOP_MARKET,
+                    stopPrice=self._round_price(symbol, sl_price),
+                    quantity=quantity,
+                    reduceOnly=True
+                ))
+            )
+            logger.info(f"✅ TP/SL configurados para {symbol}: TP=${tp_price}, SL=${sl_price}")
+        except Exception as e:
+            logger.error(f"❌ Error configurando TP/SL: {e!r}")
+
+    # ============== RIESGO ==============
+
+    async def _mark_price_stream(self):
+        """Stream !markPrice@arr; el polling cubre los huecos si se cae"""
+        while True:
+            try:
+                socket = BinanceSocketManager(self.client).all_mark_price_socket()
+                async with socket as stream:
+                    logger.info("📡 Stream de mark prices iniciado")
+                    while True:
+                        self._handle_mark_prices(await stream.recv())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Error en stream de mark prices, reconectando: {e!r}")
+                await asyncio.sleep(RISK_POLL_INTERVAL)
+
+    async def _mark_price_poller(self):
+        """Todos los mark prices en una llamada si el stream no está activo; balance y posiciones cada RISK_ACCOUNT_SYNC"""
+        last_sync = time.time()
+        while True:
+            # Un TP/SL ejecutado entre ciclos no debe seguir valorándose contra el balance anterior
+            if time.time() - last_sync >= RISK_ACCOUNT_SYNC:
+                last_sync = time.time()
+                account_info = await self.get_account_info()
+                if account_info:
+                    self.risk.sync_account(account_info)
+            if time.time() - self.last_stream_mark > 3 * RISK_POLL_INTERVAL:
+                try:
+                    for item in await self._io(self.client.futures_mark_price()):
+                        self.risk.on_mark_price(item['symbol'], float(item['markPrice']))
+                except Exception as e:
+                    logger.warning(f"⚠️ Error consultando mark prices: {e!r}")
+            await asyncio.sleep(RISK_POLL_INTERVAL)
+
+    def _on_risk_breach(self, state: dict):
+        """Callback síncrono del motor de riesgo: la reacción se programa como tarea"""
+        self.is_paused = True
+        self._spawn(self._react_to_breach(state))
+
+    async def _react_to_breach(self, state: dict):
+        msg = f"⚠️ PAUSA - Límite diario alcanzado: {state['daily_return']*100:.2f}%"
+        if RISK_ACTION == 'flatten':
+            async with self.trade_lock:
+                await self._close_all_positions()
+            msg += "\n🧹 Posiciones cerradas"
+        await self._notify(msg)
+
+    # ============== TELEGRAM ==============
+
+    async def _telegram_api(self, method: str, deadline: float = IO_TIMEOUT, **payload) -> Optional[dict]:
+        url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/{method}"
+        async with self.session.post(url, json=payload, timeout=aiohttp.ClientTimeout(total=deadline)) as response:
+            if response.status != 200:
+                return None
+            return await response.json()
+
+    async def _telegram_listener(self):
+        """Long polling de Telegram; cada mensaje se atiende en su propia tarea"""
+        logger.info("📱 Iniciando Telegram polling...")
+        while True:
+            try:
+                result = await self._telegram_api(
+                    "getUpdates", deadline=35, offset=self.last_update_id + 1, timeout=30
+                )
+                for update in (result or {}).get("result", []):
+                    self.last_update_id = update["update_id"]
+                    if "message" in update:
+                        self._handle_telegram_message(update["message"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Error en Telegram polling: {e!r}")
+                await asyncio.sleep(5)
+
+    def _handle_telegram_message(self, message: dict):
+        chat_id = message["chat"]["id"]
+        text = message.get("text", "").strip()
+        if not text:
+            return
+        handler, args = self._route_telegram(text)
+        self._spawn(handler(chat_id, *args))
+
+    async def _cmd_start(self, chat_id: int):
+        await self._send_telegram(chat_id, TELEGRAM_HELP)
+
+    async def _cmd_unknown(self, chat_id: int):
+        await self._send_telegram(chat_id, "Comando no reconocido. Usa /start para ver comandos.")
+
+    async def _cmd_status(self, chat_id: int):
+        account = await self.get_account_info()
+        if not account:
+            await self._send_telegram(chat_id, "❌ Error obteniendo datos de cuenta")
+            return
+        await self._send_telegram(chat_id, self._status_message(account))
+
+    async def _cmd_history(self, chat_id: int):
+        await self._send_telegram(chat_id, self._history_message())
+
+    async def _cmd_market(self, chat_id: int):
+        try:
+            await self._send_telegram(chat_id, self._market_message(await self.get_market_data()))
+        except Exception as e:
+            await self._send_telegram(chat_id, f"❌ Error: {e}")
+
+    async def _cmd_risk(self, chat_id: int):
+        await self._send_telegram(chat_id, self._risk_message())
+
+    async def _cmd_chat(self, chat_id: int, question: str):
+        try:
+            account, market_data = await asyncio.gather(self.get_account_info(), self.get_market_data())
+            async with self.session.post(
+                OPENROUTER_URL,
+                headers={
+                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+                    "Content-Type": "application/json"
+                },
+                json=self._chat_request(account, market_data, question),
+                timeout=aiohttp.ClientTimeout(total=30)
+            ) as response:
+                if response.status == 200:
+                    answer = (await response.json())['choices'][0]['message']['content']
+                    await self._send_telegram(chat_id, f"🤖 {answer}")
+                else:
+                    await self._send_telegram(chat_id, "❌ Error consultando IA")
+        except Exception as e:
+            await self._send_telegram(chat_id, f"❌ Error: {e}")
+
+    async def _send_telegram(self, chat_id: int, message: str):
+        try:
+            if await self._telegram_api("sendMessage", chat_id=chat_id, text=message, parse_mode="Markdown") is None:
+                logger.warning("⚠️ Telegram rechazó el mensaje (¿Markdown inválido?)")
+        except Exception as e:
+            logger.warning(f"⚠️ Error enviando Telegram: {e!r}")
+
+    async def _notify(self, message: str):
+        if TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID:
+            await self._send_telegram(TELEGRAM_CHAT_ID, f"🤖 Alpha Arena Bot\n\n{message}")
+
+    # ============== LOOP ==============
+
+    async def _trading_cycle(self):
+        """Un ciclo de decisión: riesgo → mercado → invalidaciones → IA → órdenes → checkpoint"""
+        account_info = await self.get_account_info()
+        if account_info:
+            self.risk.sync_account(account_info)
+        # En pausa el ciclo sigue (invalidaciones, cierres de la IA); _skip_trade bloquea las entradas
+        self.is_paused = self.risk.is_paused()
+        if self.is_paused:
+            logger.info("⏸️ Límite diario alcanzado: solo cierres hasta el próximo día UTC")
+
+        logger.info("📊 Obteniendo datos de mercado...")
+        universe = {}
+        if SCREENER_ENABLED:
+            try:
+                universe = await self.screen_universe()
+            except Exception as e:
+                logger.warning(f"⚠️ Error en screener, usando TRADING_PAIRS: {e!r}")
+        pairs = (list(universe) + [s for s in self.positions if s not in universe]) if universe else TRADING_PAIRS
+        market_data = await self.get_market_data(pairs)
+
+        if not market_data or not account_info:
+            logger.warning("⚠️ No se pudieron obtener datos, reintentando...")
+            return
+
+        self._sync_positions(account_info)
+        self.candle_times = {pair: data['candle_time'] for pair, data in market_data.items() if data}
+
+        open_before = set(self.positions)
+        async with self.trade_lock:
+            await self.check_invalidations(market_data)
+        if set(self.positions) != open_before:
+            account_info = await self.get_account_info() or account_info
+            self.risk.sync_account(account_info)
+
+        logger.info("🧠 Consultando DeepSeek...")
+        prompt_data = self.select_prompt_pairs(market_data, universe) if universe else market_data
+        if MARKET_FEATURES:
+            await self.add_open_interest(prompt_data)
+        prompt = self.build_prompt(prompt_data, account_info)
+        decision = await self.query_deepseek(prompt)
+        await asyncio.to_thread(
+            self._review_decision, prompt, decision, prompt_data, account_info, copy.deepcopy(self.positions)
+        )
+
+        if not self.first_decision_logged:
+            self.first_decision_logged = True
+            logger.info(f"⏱️ Primera decisión a los {time.time() - PROCESS_START:.2f}s del arranque")
+
+        if decision:
+            open_before = set(self.positions)
+            async with self.trade_lock:
+                for d in decision if isinstance(decision, list) else [decision]:
+                    await self.execute_trade(d)
+            if set(self.positions) != open_before:
+                refreshed = await self.get_account_info()
+                if refreshed:
+                    self.risk.sync_account(refreshed)
+        else:
+            logger.warning("⚠️ No se obtuvo decisión válida de DeepSeek")
+
+        await asyncio.to_thread(self._checkpoint, self._checkpoint_state())
+        logger.info(f"💰 Balance: ${account_info['balance']:,.2f} | PnL: ${account_info['unrealized_pnl']:,.2f}")
+
+    async def _trading_loop(self):
+        logger.info("🚀 Iniciando loop de trading...")
+        await self._notify("🚀 Bot iniciado - Modo Alpha Arena")
+        while True:
+            try:
+                await self._trading_cycle()
+                logger.info(f"⏳ Próxima decisión en {LOOP_INTERVAL} segundos...")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Error en loop principal: {e!r}")
+            await asyncio.sleep(LOOP_INTERVAL)
+
+    async def run(self):
+        """Arranca y ejecuta todas las tareas hasta SIGINT/SIGTERM"""
+        main_task = asyncio.current_task()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, main_task.cancel)
+            except NotImplementedError:  # Windows
+                pass
+
+        try:
+            await self.start()
+            async with asyncio.TaskGroup() as tasks:
+                self.tasks = tasks
+                tasks.create_task(self._trading_loop())
+                tasks.create_task(self._mark_price_poller())
+                if RISK_FEED == 'websocket':
+                    tasks.create_task(self._mark_price_stream())
+                if TELEGRAM_BOT_TOKEN:
+                    tasks.create_task(self._telegram_listener())
+                    logger.info("📱 Telegram listener iniciado")
+        except asyncio.CancelledError:
+            logger.info("🛑 Bot detenido")
+        finally:
+            if self.session and TELEGRAM_BOT_TOKEN:
+                await self._notify("🛑 Bot detenido")
+            await self.close()
@@ -0,0 +1,84 @@
+"""
+Configuración del Alpha Arena Trading Bot
+Variables de entorno (.env) y parámetros de trading, compartidos por el núcleo con
+hilos (main.py) y el asyncio (async_bot.py).
+"""
+
+import time
+
+PROCESS_START = time.time()  # Para el desglose de tiempos de arranque (primer import del proceso)
+
+import os
+from dotenv import load_dotenv
+from execution import EXECUTION_STYLES
+
+load_dotenv()
+
+# ============== CONFIGURACIÓN ==============
+OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+BINANCE_API_KEY = os.getenv("BINANCE_API_KEY")
+BINANCE_SECRET_KEY = os.getenv("BINANCE_SECRET_KEY")
+TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
+TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID", "")
+
+# ============== CONFIGURACIÓN ==============
+# Monk Mode: mismo config que baseline, diferencia es el prompt
+TRADING_PAIRS = ["BTCUSDT", "ETHUSDT", "SOLUSDT", "XRPUSDT", "DOGEUSDT", "BNBUSDT"]
+TRADING_PAIRS_SHORT = ["BTC", "ETH", "SOL", "XRP", "DOGE", "BNB"]  # Para el output de la IA
+LOOP_INTERVAL = 120  # 2 minutos entre decisiones (Alpha Arena style)
+MAX_LEVERAGE = 20
+DEFAULT_LEVERAGE = 10
+CASH_BUFFER_PERCENT = 0.30  # 30% en reserva
+MAX_POSITIONS = 6
+MIN_CONFIDENCE = 0.70  # Monk Mode: >0.7 confianza
+DAILY_LOSS_LIMIT = 0.05  # -5% pausa el trading
+INITIAL_BALANCE = 10000  # Para testnet
+TRADING_MODE = "monk_mode"  # baseline, monk_mode, max_leverage
+
+# Indicadores en un pool de procesos (snapshot en memoria compartida)
+USE_PROCESS_POOL = os.getenv("USE_PROCESS_POOL", "false").lower() == "true"
+PROCESS_POOL_WORKERS = int(os.getenv("PROCESS_POOL_WORKERS", "0")) or None  # None = todos los cores
+
+# Checkpoint de estado y reinicio en caliente (sin cerrar posiciones)
+WARM_START = os.getenv("WARM_START", "false").lower() == "true"
+STATE_FILE = os.getenv("STATE_FILE", "bot_state.json")
+
+# Arranque rápido: inicialización del exchange en paralelo y precarga de pandas/ta
+FAST_STARTUP = os.getenv("FAST_STARTUP", "true").lower() == "true"
+STARTUP_WORKERS = 8
+
+# Screener: vigila todos los perpetuos USDT y solo envía los top-K candidatos a la IA
+SCREENER_ENABLED = os.getenv("SCREENER_ENABLED", "false").lower() == "true"
+SCREENER_UNIVERSE_SIZE = int(os.getenv("SCREENER_UNIVERSE_SIZE", "100"))  # Pares con indicadores por ciclo
+MARKET_DATA_WORKERS = 8  # Descargas de velas en paralelo
+
+# Funding, order book y open interest en el prompt (endpoints bulk + caché TTL)
+MARKET_FEATURES = os.getenv("MARKET_FEATURES", "false").lower() == "true"
+
+# Motor de riesgo: ancla diaria UTC + mark-to-market continuo
+RISK_ACTION = os.getenv("RISK_ACTION", "pause")  # pause | flatten (cierra todo al alcanzar el límite)
+RISK_FEED = os.getenv("RISK_FEED", "websocket")  # websocket | polling
+RISK_POLL_INTERVAL = 5  # Segundos entre consultas de mark price (modo polling)
+RISK_ACCOUNT_SYNC = 15  # Segundos entre resincronizaciones de balance/posiciones (TP/SL ejecutados en el exchange)
+
+# Ejecución de órdenes (execution.py)
+EXECUTION_STYLE = os.getenv("EXECUTION_STYLE", "market")  # market | post_only | ioc
+EXECUTION_TIMEOUT = float(os.getenv("EXECUTION_TIMEOUT", "5"))  # Segundos que espera la orden post-only antes de ir a mercado
+EXECUTION_SLICE_USD = float(os.getenv("EXECUTION_SLICE_USD", "0"))  # Nocional máximo por orden hija (0 = sin trocear)
+EXECUTION_POLL = 0.5  # Segundos entre consultas del estado de la orden límite
+if EXECUTION_STYLE not in EXECUTION_STYLES:
+    raise ValueError(f"EXECUTION_STYLE inválido: {EXECUTION_STYLE} (opciones: {', '.join(EXECUTION_STYLES)})")
+
+# Grabación de prompts/respuestas para replay.py (vacío = desactivado)
+RECORD_FILE = os.getenv("RECORD_FILE", "")  # p.ej. decisions.jsonl.gz
+
+# Núcleo asyncio (async_bot.py): un único event loop en lugar de hilos
+ASYNC_CORE = os.getenv("ASYNC_CORE", "false").lower() == "true"
+
+# Logging: escritura en un hilo aparte (cola), con rotación
+LOG_FILE = os.getenv("LOG_FILE", "trading_bot.log")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # text | json (JSON-lines)
+LOG_ROTATE = os.getenv("LOG_ROTATE", "size")  # size | time (diaria, medianoche UTC)
+LOG_MAX_MB = int(os.getenv("LOG_MAX_MB", "10"))  # Tamaño por archivo (rotación por tamaño)
+LOG_BACKUPS = int(os.getenv("LOG_BACKUPS", "5"))  # Archivos rotados que se conservan
+LOG_PAYLOAD_SAMPLE = int(os.getenv("LOG_PAYLOAD_SAMPLE", "10"))  # Payload de DeepSeek completo 1 de cada N (0 = solo hash)
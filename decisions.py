@@ -0,0 +1,78 @@
+"""
+Parseo y validación de las respuestas de DeepSeek
+(compartido por el bot, el núcleo asyncio y replay.py)
+"""
+
+import json
+from typing import List, Optional, Union
+
+
+def clean_response(content: str) -> str:
+    """Quita los bloques ```json ... ``` que a veces rodean la respuesta"""
+    content = content.strip()
+    if content.startswith('```json'):
+        content = content[7:]
+    if content.startswith('```'):
+        content = content[3:]
+    if content.endswith('```'):
+        content = content[:-3]
+    return content.strip()
+
+
+def parse_decision(content: str) -> Union[dict, list]:
+    """Convierte la respuesta de la IA en decisión(es); lanza json.JSONDecodeError si no es JSON"""
+    return json.loads(clean_response(content))
+
+
+SIGNALS = ('buy_to_enter', 'sell_to_enter', 'hold', 'close')
+ENTRY_SIGNALS = ('buy_to_enter', 'sell_to_enter')
+
+
+def as_list(decision: Union[dict, list, None]) -> list:
+    """La IA puede devolver una decisión o una lista de decisiones"""
+    if decision is None:
+        return []
+    return decision if isinstance(decision, list) else [decision]
+
+
+def validate_decision(decision, market_data: Optional[dict] = None) -> List[str]:
+    """Problemas de una decisión (lista vacía = válida). Con market_data también revisa TP/SL contra el precio"""
+    if not isinstance(decision, dict):
+        return ['no es un objeto JSON']
+
+    errors = []
+    signal = decision.get('signal')
+    if signal not in SIGNALS:
+        errors.append(f"signal desconocida: {signal!r}")
+    coin = str(decision.get('coin') or '').upper()
+    if signal != 'hold' and not coin:
+        errors.append('falta coin')
+    if signal not in ENTRY_SIGNALS:
+        return errors
+
+    for field in ('confidence', 'leverage', 'quantity', 'profit_target', 'stop_loss', 'risk_usd'):
+        value = decision.get(field)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            errors.append(f"{field} no numérico: {value!r}")
+    if errors:
+        return errors
+
+    # null cuenta como ausente (los defaults los pone _parse_trade)
+    confidence, leverage = decision.get('confidence'), decision.get('leverage')
+    if confidence is not None and not 0 <= confidence <= 1:
+        errors.append(f"confidence fuera de 0..1: {confidence}")
+    if leverage is not None and leverage <= 0:
+        errors.append(f"leverage inválido: {leverage}")
+
+    tp, sl = decision.get('profit_target') or 0, decision.get('stop_loss') or 0
+    if not tp or not sl:
+        errors.append('entrada sin profit_target/stop_loss')
+    else:
+        symbol = coin if coin.endswith('USDT') else f"{coin}USDT"
+        data = (market_data or {}).get(symbol)
+        if data:
+            price = data['price']
+            ordered = sl < price < tp if signal == 'buy_to_enter' else tp < price < sl
+            if not ordered:
+                errors.append(f"TP/SL del lado equivocado del precio ({symbol}: TP={tp}, SL={sl}, precio={price})")
+    return errors
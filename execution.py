@@ -0,0 +1,91 @@
+"""
+Motor de ejecución: estilos de orden, troceo y reporte de slippage
+- market: orden de mercado (comportamiento original)
+- post_only: límite GTX en el mejor precio propio (maker); lo no llenado tras el timeout va a mercado
+- ioc: límite IOC al precio del lado contrario (taker con tope de precio); el resto va a mercado
+Las órdenes grandes se trocean en hijas de nocional máximo. Aquí solo está la
+lógica pura; el I/O (sync y asyncio) vive en los bots.
+"""
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+EXECUTION_STYLES = ('market', 'post_only', 'ioc')
+
+# Estados finales de una orden en Binance Futures
+FINAL_STATUSES = {'FILLED', 'CANCELED', 'EXPIRED', 'REJECTED'}
+
+
+def child_quantities(quantity: float, price: float, max_notional: float, decimals: int) -> List[float]:
+    """Trocea la cantidad en hijas de nocional <= max_notional (0 = sin trocear)
+
+    Se trabaja en unidades enteras del step (10^-decimals): las hijas se redondean hacia
+    abajo y el resto se reparte de a un step, así suman exactamente `quantity`.
+    """
+    scale = 10 ** decimals
+    units = round(quantity * scale)
+    max_units = math.floor(max_notional / price * scale) if max_notional > 0 else 0
+    if max_units <= 0 or units <= max_units:
+        # Sin troceo, o el nocional de un solo step ya supera el máximo
+        return [quantity]
+
+    count = math.ceil(units / max_units)
+    base, extra = divmod(units, count)
+    child_units = [base + 1] * extra + [base] * (count - extra)
+    if sum(child_units) != units or max(child_units) > max_units:
+        raise ValueError(f"Troceo inconsistente: {child_units} para {units} unidades (máx {max_units})")
+    return [round(u / scale, decimals) for u in child_units]
+
+
+def limit_price(style: str, side: str, bid: float, ask: float) -> float:
+    """post_only se queda en su lado del libro; ioc cruza al mejor precio contrario"""
+    if style == 'post_only':
+        return bid if side == 'BUY' else ask
+    return ask if side == 'BUY' else bid
+
+
+def order_fill(order: dict) -> Tuple[float, float]:
+    """(cantidad ejecutada, precio medio) de una respuesta de orden"""
+    executed = float(order.get('executedQty') or 0)
+    avg_price = float(order.get('avgPrice') or 0)
+    return executed, avg_price
+
+
+def slippage_bps(side: str, decision_price: float, fill_price: float) -> float:
+    """Slippage en bps respecto al precio de decisión; positivo = peor precio"""
+    if not decision_price or not fill_price:
+        return 0.0
+    signed = (fill_price - decision_price) if side == 'BUY' else (decision_price - fill_price)
+    return round(signed / decision_price * 10000, 2)
+
+
+def fill_report(style: str, side: str, decision_price: float, fills: List[Tuple[float, float, str]],
+                latency_ms: float, children: int, error: Optional[str] = None) -> Dict:
+    """Resumen de una ejecución. fills = [(cantidad, precio, 'maker'|'taker'), ...]; error si quedó a medias"""
+    filled = sum(qty for qty, _, _ in fills)
+    avg_price = sum(qty * price for qty, price, _ in fills) / filled if filled else 0.0
+    maker = sum(qty for qty, _, liquidity in fills if liquidity == 'maker')
+    return {
+        'style': style,
+        'decision_price': decision_price,
+        'avg_price': round(avg_price, 8),
+        'filled_qty': round(filled, 8),
+        'maker_ratio': round(maker / filled, 3) if filled else 0.0,
+        'slippage_bps': slippage_bps(side, decision_price, avg_price),
+        'latency_ms': round(latency_ms, 1),
+        'children': children,
+        'error': error,
+    }
+
+
+def describe_report(report: Optional[Dict]) -> str:
+    """Línea para logs y Telegram (parse_mode Markdown: sin '_' ni '*' sueltos)"""
+    if not report:
+        return ""
+    style = report['style'].replace('_', '-')  # post_only abriría una cursiva sin cerrar
+    text = (f"⚡ {style} | slippage {report['slippage_bps']:+.2f} bps | "
+            f"{report['latency_ms']:.0f} ms | maker {report['maker_ratio'] * 100:.0f}% | {report['children']} orden(es)")
+    if report.get('error'):
+        error = str(report['error']).replace('`', "'")
+        text += f" | ⚠️ ejecución parcial (`{error}`)"
+    return text
@@ -0,0 +1,77 @@
+"""
+Features de funding, order book y open interest para el prompt
+Funding y top-of-book salen de endpoints bulk (todos los símbolos en una llamada:
+premiumIndex y bookTicker sin symbol) y se cachean con TTL, así que el número de
+requests por ciclo no crece con los pares.
+"""
+
+import time
+from typing import Any, Dict, Hashable, List, Optional
+
+FUNDING_TTL = 60  # premiumIndex: el funding estimado cambia despacio
+BOOK_TTL = 5  # bookTicker: el top-of-book envejece rápido
+OPEN_INTEREST_TTL = 300  # openInterest no tiene versión bulk: se pide por par y se cachea más
+
+
+class TTLCache:
+    """Valores con marca de tiempo; get devuelve None si ya caducaron"""
+
+    def __init__(self):
+        self._entries: Dict[Hashable, tuple] = {}
+
+    def get(self, key: Hashable, ttl: float) -> Optional[Any]:
+        value, stored_at = self._entries.get(key, (None, 0.0))
+        return value if time.time() - stored_at < ttl else None
+
+    def put(self, key: Hashable, value: Any):
+        self._entries[key] = (value, time.time())
+
+
+def parse_premium_index(items: List[dict]) -> Dict[str, float]:
+    """futures_mark_price() sin symbol -> funding rate por símbolo"""
+    return {item['symbol']: float(item['lastFundingRate']) for item in items if item.get('lastFundingRate') not in (None, '')}
+
+
+def parse_book_ticker(items: List[dict]) -> Dict[str, dict]:
+    """futures_orderbook_ticker() sin symbol -> spread (bps) e imbalance (-1..1) del top-of-book"""
+    book = {}
+    for item in items:
+        bid, ask = float(item['bidPrice']), float(item['askPrice'])
+        bid_qty, ask_qty = float(item['bidQty']), float(item['askQty'])
+        if bid <= 0 or ask <= 0 or bid_qty + ask_qty <= 0:
+            continue
+        book[item['symbol']] = {
+            'spread_bps': round((ask - bid) / ((ask + bid) / 2) * 10000, 2),
+            'book_imbalance': round((bid_qty - ask_qty) / (bid_qty + ask_qty), 3)
+        }
+    return book
+
+
+def add_features(market_data: Dict[str, dict], funding: Dict[str, float], book: Dict[str, dict]):
+    """Añade funding_rate, spread_bps y book_imbalance a cada par con datos"""
+    for pair, data in market_data.items():
+        if not data:
+            continue
+        if pair in funding:
+            data['funding_rate'] = funding[pair]
+        data.update(book.get(pair, {}))
+
+
+def add_open_interest(market_data: Dict[str, dict], open_interest: Dict[str, float]):
+    """Open interest en USD (contratos * precio)"""
+    for pair, contracts in open_interest.items():
+        data = market_data.get(pair)
+        if data:
+            data['open_interest_usd'] = round(contracts * data['price'], 2)
+
+
+def format_features(data: dict) -> str:
+    """Líneas del prompt para las features disponibles del par ('' si no hay ninguna)"""
+    parts = []
+    if 'funding_rate' in data:
+        parts.append(f"Funding: {data['funding_rate'] * 100:.4f}%")
+    if 'book_imbalance' in data:
+        parts.append(f"Book imbalance: {data['book_imbalance']:+.2f} | Spread: {data['spread_bps']} bps")
+    if 'open_interest_usd' in data:
+        parts.append(f"Open interest: ${data['open_interest_usd']:,.0f}")
+    return f"  {' | '.join(parts)}\n" if parts else ""
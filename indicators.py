@@ -0,0 +1,69 @@
+"""
+Indicadores técnicos para Alpha Arena Trading Bot
+RSI, MACD y EMA calculados sobre velas de 15min
+"""
+
+import numpy as np
+import pandas as pd
+from ta.momentum import RSIIndicator
+from ta.trend import MACD, EMAIndicator
+
+# Columnas de las velas que se usan para los indicadores (en este orden)
+KLINE_FIELDS = ('close', 'high', 'low', 'volume')
+# Índices dentro de cada kline de Binance: [timestamp, open, high, low, close, volume, ...]
+_KLINE_INDEXES = (4, 2, 3, 5)
+# Velas mínimas: EMA50 definida en la vela en curso y en las dos cerradas anteriores
+MIN_CANDLES = 52
+
+
+def klines_to_array(klines: list) -> np.ndarray:
+    """Convierte klines de Binance a un array (len(KLINE_FIELDS), n_velas) de float64"""
+    data = np.empty((len(KLINE_FIELDS), len(klines)), dtype=np.float64)
+    for row, index in enumerate(_KLINE_INDEXES):
+        data[row] = [float(k[index]) for k in klines]
+    return data
+
+
+def is_complete(indicators: dict) -> bool:
+    """False si algún indicador es NaN/inf (historial corto o serie sin variación)"""
+    values = [v for k, v in indicators.items() if k not in ('trend', 'closed', 'prev_closed')]
+    values += list(indicators['closed'].values()) + list(indicators['prev_closed'].values())
+    return bool(np.isfinite(values).all())
+
+
+def compute_indicators(data: np.ndarray) -> dict:
+    """Calcula los indicadores sobre un array de velas (ver klines_to_array)"""
+    close = pd.Series(data[0], copy=False)
+    volume = data[3]
+
+    rsi = RSIIndicator(close, window=14).rsi()
+    macd_indicator = MACD(close, window_fast=12, window_slow=26, window_sign=9)
+    macd = macd_indicator.macd()
+    macd_signal = macd_indicator.macd_signal()
+    ema_20 = EMAIndicator(close, window=20).ema_indicator()
+    ema_50 = EMAIndicator(close, window=50).ema_indicator()
+
+    def closed(index: int) -> dict:
+        # Estado de una vela cerrada para las invalidaciones (la última kline es la vela en curso)
+        return {
+            'close': float(close.iloc[index]),
+            'rsi': round(float(rsi.iloc[index]), 2),
+            'macd': round(float(macd.iloc[index]), 4),
+            'macd_signal': round(float(macd_signal.iloc[index]), 4),
+            'ema_20': round(float(ema_20.iloc[index]), 2),
+            'ema_50': round(float(ema_50.iloc[index]), 2),
+        }
+
+    # Último valor de indicadores (float nativo para que sea serializable)
+    return {
+        'rsi': round(float(rsi.iloc[-1]), 2),
+        'macd': round(float(macd.iloc[-1]), 4),
+        'macd_signal': round(float(macd_signal.iloc[-1]), 4),
+        'ema_20': round(float(ema_20.iloc[-1]), 2),
+        'ema_50': round(float(ema_50.iloc[-1]), 2),
+        'volume_24h': round(float(volume.sum()), 2),
+        'trend': 'BULLISH' if ema_20.iloc[-1] > ema_50.iloc[-1] else 'BEARISH',
+        # Los indicadores son causales: los valores en -2/-3 son los de klines[:-1]/klines[:-2]
+        'closed': closed(-2),
+        'prev_closed': closed(-3),
+    }
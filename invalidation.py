@@ -0,0 +1,117 @@
+"""
+Compilador de condiciones de invalidación
+Convierte textos como "Price closes below EMA50" o "RSI above 70 or MACD crosses
+below signal" en predicados sobre los indicadores, para cerrar posiciones sin
+consultar a la IA. Lo que no se entiende devuelve None y queda para DeepSeek.
+
+Los predicados se evalúan sobre velas cerradas: reciben el estado de la última vela
+cerrada y el de la anterior (ver 'closed'/'prev_closed' en compute_indicators).
+"Crosses" exige que la vela anterior estuviera del otro lado.
+"""
+
+import re
+import operator
+from typing import Callable, Dict, Optional, Tuple
+
+# predicate(última vela cerrada, vela cerrada anterior)
+Predicate = Callable[[dict, dict], bool]
+
+# Textos que significan "sin condición"
+EMPTY_CONDITIONS = {'', 'none', 'n/a', 'na', 'null', '-'}
+
+# Sujeto / objetivo -> clave del dict de indicadores de la vela cerrada
+_OPERANDS = {
+    'price': 'close',
+    'close': 'close',
+    'rsi': 'rsi',
+    'macd': 'macd',
+    'signal': 'macd_signal',
+    'macd signal': 'macd_signal',
+    'signal line': 'macd_signal',
+    'ema20': 'ema_20',
+    'ema50': 'ema_50',
+}
+# "BTC closes below 48000": el nombre de la moneda equivale al precio (solo el de la propia posición)
+_COINS = ('btc', 'eth', 'sol', 'xrp', 'doge', 'bnb')
+_OPERANDS.update({coin: 'close' for coin in _COINS})
+
+_COMPARATORS = {
+    'below': operator.lt, 'under': operator.lt, '<': operator.lt, '<=': operator.le,
+    'above': operator.gt, 'over': operator.gt, '>': operator.gt, '>=': operator.ge,
+}
+
+# Verbos que no cambian el significado ("closes below" == "below")
+_VERBS = r'(?:closes?|breaks?|drops?|falls?|moves?|goes?|rises?|is|crosses?|trades?|stays?)'
+
+_OPERAND_RE = rf'(?:macd signal|signal line|signal|price|close|rsi|macd|ema ?_?(?:20|50)|{"|".join(_COINS)})'
+_NUMBER_RE = r'\$?-?[\d,]*\.?\d+'
+
+_CLAUSE = re.compile(
+    rf'^(?:the )?(?P<subject>{_OPERAND_RE})(?: (?P<verb>{_VERBS}))?(?: back)? '
+    rf'(?P<cmp>below|under|above|over|<=|>=|<|>) '
+    rf'(?:the )?(?P<target>{_OPERAND_RE}|{_NUMBER_RE})$'
+)
+
+
+def _operand_key(token: str) -> Optional[str]:
+    return _OPERANDS.get(re.sub(r'ema ?_?', 'ema', token))
+
+
+def _compile_clause(clause: str, coin: str) -> Optional[Predicate]:
+    match = _CLAUSE.match(clause.strip())
+    if not match:
+        return None
+
+    # "BTC breaks below 60000" en una posición de SOL habla de otro mercado: queda para la IA
+    if any(token in _COINS and token != coin for token in (match['subject'], match['target'])):
+        return None
+
+    subject = _operand_key(match['subject'])
+    compare = _COMPARATORS[match['cmp']]
+
+    target = match['target']
+    target_key = _operand_key(target)
+    if target_key:
+        holds = lambda state: compare(state[subject], state[target_key])
+    else:
+        level = float(target.replace('$', '').replace(',', ''))
+        holds = lambda state: compare(state[subject], level)
+
+    if match['verb'] and match['verb'].startswith('cross'):
+        return lambda state, prev: holds(state) and not holds(prev)
+    return lambda state, prev: holds(state)
+
+
+def compile_condition(text: str, symbol: str = '') -> Optional[Predicate]:
+    """Compila una condición para la posición en `symbol`; None si no es vacía pero no se puede interpretar"""
+    normalized = re.sub(r'\s+', ' ', text.strip().lower()).rstrip('.')
+    if normalized in EMPTY_CONDITIONS:
+        return None
+    coin = symbol.lower().removesuffix('usdt')
+
+    # "A or B and C": OR de grupos AND (precedencia habitual)
+    groups = []
+    for group in re.split(r' or |\|\|', normalized):
+        clauses = [_compile_clause(c, coin) for c in re.split(r' and |&&', group) if c.strip()]
+        if not clauses or None in clauses:
+            return None
+        groups.append(clauses)
+
+    return lambda state, prev: any(all(clause(state, prev) for clause in group) for group in groups)
+
+
+class InvalidationCache:
+    """Compila cada (texto, símbolo) una sola vez (las condiciones se repiten en cada vela)"""
+
+    def __init__(self):
+        self._compiled: Dict[Tuple[str, str], Optional[Predicate]] = {}
+
+    def get(self, text: str, symbol: str = '') -> Optional[Predicate]:
+        key = (text, symbol)
+        if key not in self._compiled:
+            self._compiled[key] = compile_condition(text, symbol)
+        return self._compiled[key]
+
+    @staticmethod
+    def is_empty(text: Optional[str]) -> bool:
+        return not text or text.strip().lower().rstrip('.') in EMPTY_CONDITIONS
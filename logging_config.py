@@ -0,0 +1,132 @@
+"""
+Logging del bot: handler asíncrono (cola + hilo escritor), rotación y formato JSON-lines
+El loop solo encola el registro; formatear y escribir a disco/consola ocurre en
+el hilo del QueueListener. Los payloads grandes se resumen con un hash y solo se
+vuelcan completos cada N veces.
+
+El hilo escritor no arranca en setup_logging sino en start_logging, después de crear
+el pool de procesos: un fork con hilos vivos hereda sus locks en cualquier estado.
+"""
+
+import copy
+import json
+import queue
+import atexit
+import hashlib
+import logging
+from typing import Optional
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Atributos estándar de LogRecord: lo demás viene de extra={...}
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+_listener: Optional[QueueListener] = None
+_started = False
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro: ts, level, logger, msg y los campos de extra"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS})
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class LocalQueueHandler(QueueHandler):
+    """QueueHandler para una cola del mismo proceso: interpola el mensaje ya (los args pueden
+    cambiar después) pero conserva exc_info/stack_info para el formatter del listener, que
+    pone el traceback en su sitio (línea aparte en texto, campo 'exc' en JSON)"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        return record
+
+
+def setup_logging(path: str, fmt: str = 'text', rotate: str = 'size', max_mb: int = 10,
+                  backups: int = 5, level: int = logging.INFO) -> QueueListener:
+    """Configura el root logger con un QueueHandler (una sola vez); los registros se encolan hasta start_logging"""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    if rotate == 'time':
+        file_handler = TimedRotatingFileHandler(path, when='midnight', utc=True, backupCount=backups, encoding='utf-8')
+    else:
+        file_handler = RotatingFileHandler(path, maxBytes=max_mb * 1024 * 1024, backupCount=backups, encoding='utf-8')
+
+    formatter = JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT)
+    handlers = [file_handler, logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    atexit.register(_flush)
+
+    # El QueueHandler solo interpola el mensaje; el formato final lo aplica el listener
+    queue_handler = LocalQueueHandler(log_queue)
+    logging.basicConfig(level=level, handlers=[queue_handler], force=True)
+    return _listener
+
+
+def start_logging():
+    """Arranca el hilo escritor (idempotente). Llamar después de crear procesos con fork"""
+    global _started
+    if _listener is not None and not _started:
+        _listener.start()
+        _started = True
+
+
+def _flush():
+    """Al salir: escribe lo encolado (aunque el hilo no llegara a arrancar) y detiene el listener"""
+    global _started
+    if _listener is None:
+        return
+    start_logging()
+    _listener.stop()
+    _started = False
+
+
+def reset_worker_logging(level: int = logging.INFO):
+    """Initializer de procesos hijos: el QueueHandler heredado apunta a una cola que nadie lee"""
+    logging.basicConfig(level=level, format=TEXT_FORMAT, handlers=[logging.StreamHandler()], force=True)
+
+
+class PayloadSampler:
+    """Resume payloads grandes: hash y tamaño siempre, contenido completo 1 de cada `every` (0 = nunca)"""
+
+    def __init__(self, every: int):
+        self.every = every
+        self.count = 0
+
+    def sample(self, payload: dict) -> dict:
+        """Campos para el log: payload_sha, payload_chars y, si toca, payload"""
+        body = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        fields = {
+            'payload_sha': hashlib.sha256(body.encode()).hexdigest()[:16],
+            'payload_chars': len(body),
+        }
+        if self.every and self.count % self.every == 0:
+            fields['payload'] = payload
+        self.count += 1
+        return fields
+
+    @staticmethod
+    def describe(fields: dict) -> str:
+        """Texto para el formato clásico: el payload completo (si se muestreó) va indentado"""
+        summary = f"sha={fields['payload_sha']} chars={fields['payload_chars']}"
+        if 'payload' in fields:
+            return f"{summary}\n{json.dumps(fields['payload'], indent=2)}"
+        return summary
@@ -3,86 +3,102 @@ Alpha Arena Style Trading Bot
 Basado en las reglas ganadoras de DeepSeek en nof1.ai Alpha Arena
 """
 
-import os
-import json
 import time
+
+# Primer import: fija PROCESS_START (desglose de tiempos de arranque) y carga el .env
+from config import (
+    PROCESS_START, OPENROUTER_API_KEY, BINANCE_API_KEY, BINANCE_SECRET_KEY, TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID,
+    TRADING_PAIRS, LOOP_INTERVAL, MAX_LEVERAGE, DEFAULT_LEVERAGE, MAX_POSITIONS, MIN_CONFIDENCE, DAILY_LOSS_LIMIT,
+    TRADING_MODE, USE_PROCESS_POOL, PROCESS_POOL_WORKERS, WARM_START, STATE_FILE, FAST_STARTUP, STARTUP_WORKERS,
+    SCREENER_ENABLED, SCREENER_UNIVERSE_SIZE, MARKET_DATA_WORKERS, MARKET_FEATURES,
+    RISK_ACTION, RISK_FEED, RISK_POLL_INTERVAL, RISK_ACCOUNT_SYNC, EXECUTION_STYLE, EXECUTION_TIMEOUT, EXECUTION_SLICE_USD, EXECUTION_POLL,
+    RECORD_FILE, ASYNC_CORE, LOG_FILE, LOG_FORMAT, LOG_ROTATE, LOG_MAX_MB, LOG_BACKUPS, LOG_PAYLOAD_SAMPLE
+)
+
+import copy
+import json
 import logging
+import importlib
 import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 from typing import Optional, Dict, List
 import requests
-import pandas as pd
-from ta.momentum import RSIIndicator
-from ta.trend import MACD, EMAIndicator
-from binance.client import Client
-from binance.enums import *
-from dotenv import load_dotenv
 from prompts import get_system_prompt, get_mode_config
+from state import load_state, save_state
+from risk import RiskEngine
+from invalidation import InvalidationCache
+from screener import rank_universe, score_candidates, select_candidates
+from decisions import parse_decision, as_list, validate_decision
+from recorder import DecisionRecorder
+from logging_config import setup_logging, start_logging, PayloadSampler
+from execution import FINAL_STATUSES, child_quantities, limit_price, order_fill, fill_report, describe_report
+from features import (
+    TTLCache, FUNDING_TTL, BOOK_TTL, OPEN_INTEREST_TTL,
+    parse_premium_index, parse_book_ticker, add_features, add_open_interest, format_features
+)
 
-load_dotenv()
+# python-binance, pandas y ta se importan solo donde se usan (arranque rápido).
+# Constantes equivalentes a binance.enums:
+SIDE_BUY = 'BUY'
+SIDE_SELL = 'SELL'
+ORDER_TYPE_MARKET = 'MARKET'
+FUTURE_ORDER_TYPE_TAKE_PROFIT_MARKET = 'TAKE_PROFIT_MARKET'
+FUTURE_ORDER_TYPE_STOP_MARKET = 'STOP_MARKET'
+ORDER_TYPE_LIMIT = 'LIMIT'
+TIME_IN_FORCE_GTX = 'GTX'  # Post-only
+TIME_IN_FORCE_IOC = 'IOC'
 
 # Modelo gratis para chat de Telegram
 FREE_CHAT_MODEL = "meta-llama/llama-3.2-3b-instruct:free"
+DEEPSEEK_MODEL = "deepseek/deepseek-chat"  # DeepSeek V3
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
 
-# ============== CONFIGURACIÓN ==============
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-BINANCE_API_KEY = os.getenv("BINANCE_API_KEY")
-BINANCE_SECRET_KEY = os.getenv("BINANCE_SECRET_KEY")
-TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
-TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID", "")
-
-# ============== CONFIGURACIÓN ==============
-# Monk Mode: mismo config que baseline, diferencia es el prompt
-TRADING_PAIRS = ["BTCUSDT", "ETHUSDT", "SOLUSDT", "XRPUSDT", "DOGEUSDT", "BNBUSDT"]
-TRADING_PAIRS_SHORT = ["BTC", "ETH", "SOL", "XRP", "DOGE", "BNB"]  # Para el output de la IA
-LOOP_INTERVAL = 120  # 2 minutos entre decisiones (Alpha Arena style)
-MAX_LEVERAGE = 20
-DEFAULT_LEVERAGE = 10
-CASH_BUFFER_PERCENT = 0.30  # 30% en reserva
-MAX_POSITIONS = 6
-MIN_CONFIDENCE = 0.70  # Monk Mode: >0.7 confianza
-DAILY_LOSS_LIMIT = 0.05  # -5% pausa el trading
-INITIAL_BALANCE = 10000  # Para testnet
-TRADING_MODE = "monk_mode"  # baseline, monk_mode, max_leverage
-
-# Logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('trading_bot.log'),
-        logging.StreamHandler()
-    ]
-)
+TELEGRAM_HELP = "🤖 *Alpha Arena Bot*\n\nComandos:\n/status - Ver posiciones y balance\n/history - Ver historial de trades\n/market - Ver datos de mercado\n/risk - Ver estado del límite diario\n\nO escribe cualquier pregunta sobre el mercado."
+
+setup_logging(LOG_FILE, LOG_FORMAT, LOG_ROTATE, LOG_MAX_MB, LOG_BACKUPS)
 logger = logging.getLogger(__name__)
 
 
 class TradingBot:
     def __init__(self):
-        # Binance Testnet
-        self.client = Client(
-            BINANCE_API_KEY,
-            BINANCE_SECRET_KEY,
-            testnet=True
-        )
-        self.client.FUTURES_URL = 'https://testnet.binancefuture.com/fapi'
+        self._init_state()
+        self.trade_lock = threading.RLock()  # Loop principal vs. acciones del motor de riesgo
 
-        self.positions: Dict[str, dict] = {}
-        self.trade_history: List[dict] = []  # Historial con razones
-        self.daily_pnl = 0.0
-        self.is_paused = False
-        self.last_update_id = 0  # Para polling de Telegram
-
-        logger.info("🤖 Trading Bot iniciado - Modo Alpha Arena")
-        self._setup_leverage()
-
-        # Cerrar todas las posiciones existentes para empezar limpio
-        self._close_all_positions()
+        # Binance Testnet
+        Client = self._timed('import_binance', lambda: importlib.import_module('binance.client').Client)
 
-        # Usar balance actual como punto de partida
-        account = self.client.futures_account()
-        self.starting_balance = float(account['totalWalletBalance'])
-        logger.info(f"💰 Balance inicial: ${self.starting_balance:.2f}")
+        startup_pool = ThreadPoolExecutor(max_workers=STARTUP_WORKERS if FAST_STARTUP else 1)
+        try:
+            if FAST_STARTUP:
+                # Precargar pandas/ta en segundo plano mientras esperamos a la red
+                startup_pool.submit(self._timed, 'import_indicators', importlib.import_module, 'indicators')
+
+            self.client = self._timed('client', Client, BINANCE_API_KEY, BINANCE_SECRET_KEY, testnet=True)
+            self.client.FUTURES_URL = 'https://testnet.binancefuture.com/fapi'
+
+            logger.info("🤖 Trading Bot iniciado - Modo Alpha Arena")
+
+            if WARM_START:
+                # Reanudar sin tocar las posiciones abiertas; sin checkpoint se adoptan tal cual del exchange
+                state = self._load_checkpoint()
+                self._timed('warm_start', lambda: self._warm_start(state, self.client.futures_position_information()))
+                if self.starting_balance is None:
+                    self.starting_balance = float(self.client.futures_account()['totalWalletBalance'])
+                self._timed('leverage', self._setup_leverage, startup_pool, skip=set(self.positions))
+            else:
+                # Cerrar todas las posiciones existentes para empezar limpio (en paralelo con el leverage)
+                closing = startup_pool.submit(self._timed, 'close_positions', self._close_all_positions)
+                self._timed('leverage', self._setup_leverage, startup_pool)
+                closing.result()
+
+                # Usar balance actual como punto de partida
+                account = self._timed('account', self.client.futures_account)
+                self.starting_balance = float(account['totalWalletBalance'])
+                logger.info(f"💰 Balance inicial: ${self.starting_balance:.2f}")
+        finally:
+            startup_pool.shutdown(wait=True)
 
         # Iniciar listener de Telegram en hilo separado
         if TELEGRAM_BOT_TOKEN:
@@ -90,8 +106,53 @@ class TradingBot:
             self.telegram_thread.start()
             logger.info("📱 Telegram listener iniciado")
 
+        # Mark prices para el motor de riesgo entre ciclos
+        self._start_risk_feed()
+
+        self._log_startup()
+
+    def _init_state(self):
+        """Estado en memoria del bot (sin I/O de red)"""
+        self.startup_timings: Dict[str, float] = {'imports': time.time() - PROCESS_START}
+        self.first_decision_logged = False
+
+        self.positions: Dict[str, dict] = {}
+        self.trade_history: List[dict] = []  # Historial con razones
+        self.daily_pnl = 0.0
+        self.is_paused = False
+        self.last_update_id = 0  # Para polling de Telegram
+        self.starting_balance: Optional[float] = None
+        self.risk = RiskEngine(DAILY_LOSS_LIMIT, self._on_risk_breach)
+        self.invalidations = InvalidationCache()
+        self.candle_times: Dict[str, int] = {}  # Última vela cerrada que vio la IA, por par
+        self.symbol_filters: Dict[str, dict] = {}  # Precisión por símbolo (exchangeInfo)
+        self.feature_cache = TTLCache()
+        self.payload_sampler = PayloadSampler(LOG_PAYLOAD_SAMPLE)
+        self.recorder = DecisionRecorder(RECORD_FILE) if RECORD_FILE else None
+        self.last_llm_response = ''  # Respuesta cruda de la última consulta (para el recorder)
+
+        # Pool de procesos para indicadores: antes de arrancar cualquier hilo, también el de logging
+        self.indicator_pool = None
+        if USE_PROCESS_POOL:
+            from workers import IndicatorPool
+            capacity = max(len(TRADING_PAIRS), SCREENER_UNIVERSE_SIZE + MAX_POSITIONS if SCREENER_ENABLED else 0)
+            self.indicator_pool = self._timed('process_pool', IndicatorPool, capacity, PROCESS_POOL_WORKERS)
+        start_logging()
+
+    def _log_startup(self):
+        breakdown = " | ".join(f"{phase}={seconds:.2f}s" for phase, seconds in self.startup_timings.items())
+        logger.info(f"⏱️ Arranque en {time.time() - PROCESS_START:.2f}s ({breakdown})")
+
+    def _timed(self, phase: str, fn, *args, **kwargs):
+        """Ejecuta fn y registra su duración en startup_timings"""
+        start = time.time()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.startup_timings[phase] = time.time() - start
+
     def _close_all_positions(self):
-        """Cierra todas las posiciones abiertas al iniciar"""
+        """Cierra todas las posiciones abiertas (al iniciar o por límite de riesgo)"""
         try:
             positions = self.client.futures_position_information()
             for pos in positions:
@@ -112,121 +173,359 @@ class TradingBot:
         except Exception as e:
             logger.warning(f"⚠️ Error cerrando posiciones: {e}")
 
-    def _setup_leverage(self):
-        """Configura leverage para todos los pares"""
-        for pair in TRADING_PAIRS:
+    def _load_checkpoint(self) -> dict:
+        """Checkpoint para el warm start ({} si falta o es ilegible: nunca se cae al arranque en frío)"""
+        state = load_state(STATE_FILE)
+        if state is None:
+            logger.warning(f"⚠️ WARM_START sin checkpoint válido en {STATE_FILE}: se adoptan las posiciones del exchange")
+        return state or {}
+
+    def _warm_start(self, state: dict, exchange_positions: List[dict]):
+        """Restaura el checkpoint y lo reconcilia con las posiciones del exchange"""
+        self.trade_history = state.get('trade_history', [])
+        self.last_update_id = state.get('last_update_id', 0)
+        self.risk.restore(state.get('risk', {}))
+        saved_positions = state.get('positions', {})
+
+        # Las posiciones reales mandan: el checkpoint solo aporta TP/SL/invalidación
+        for pos in exchange_positions:
+            amt = float(pos['positionAmt'])
+            if amt == 0:
+                continue
+            symbol = pos['symbol']
+            side = 'LONG' if amt > 0 else 'SHORT'
+            saved = saved_positions.get(symbol, {})
+            if saved.get('side') != side:
+                logger.warning(f"⚠️ Posición {symbol} {side} no está en el checkpoint, se adopta sin TP/SL")
+                saved = {'side': side, 'leverage': int(pos['leverage'])}
+            self.positions[symbol] = {
+                **saved,
+                'quantity': abs(amt),
+                'entry_price': float(pos['entryPrice'])
+            }
+
+        for symbol in set(saved_positions) - set(self.positions):
+            logger.info(f"🧹 {symbol} se cerró mientras el bot estaba detenido")
+
+        self.starting_balance = state.get('starting_balance')
+        logger.info(f"♻️ Warm start: {len(self.positions)} posiciones reanudadas")
+
+    def _sync_positions(self, account_info: dict):
+        """Olvida las posiciones que ya no están abiertas en el exchange (TP/SL ejecutado)"""
+        open_symbols = {pos['symbol'] for pos in account_info['open_positions']}
+        for symbol in set(self.positions) - open_symbols:
+            logger.info(f"🧹 {symbol} ya no tiene posición abierta")
+            self.positions.pop(symbol, None)
+
+    def _checkpoint_state(self) -> dict:
+        """Copia del estado a guardar: se puede serializar en otro hilo mientras el bot sigue operando"""
+        return copy.deepcopy({
+            'saved_at': datetime.now().isoformat(),
+            'positions': self.positions,
+            'trade_history': self.trade_history,
+            'starting_balance': self.starting_balance,
+            'risk': self.risk.snapshot(),
+            'last_update_id': self.last_update_id
+        })
+
+    def _checkpoint(self, state: Optional[dict] = None):
+        """Guarda el estado del bot (o una copia ya tomada con _checkpoint_state) en STATE_FILE"""
+        try:
+            save_state(STATE_FILE, state or self._checkpoint_state())
+        except Exception as e:
+            logger.warning(f"⚠️ Error guardando checkpoint: {e}")
+
+    def _start_risk_feed(self):
+        """Inicia el stream de mark prices y el polling de respaldo"""
+        self.last_stream_mark = 0.0
+        if RISK_FEED == 'websocket':
+            # En otro hilo: ThreadedWebsocketManager se bloquea hasta conectar
+            threading.Thread(target=self._start_mark_price_stream, daemon=True).start()
+        threading.Thread(target=self._mark_price_poller, daemon=True).start()
+
+    def _start_mark_price_stream(self):
+        """Suscribe el stream !markPrice@arr (todos los símbolos, cada 1s)"""
+        try:
+            from binance import ThreadedWebsocketManager
+            self.twm = ThreadedWebsocketManager(BINANCE_API_KEY, BINANCE_SECRET_KEY, testnet=True)
+            self.twm.start()
+            self.twm.start_all_mark_price_socket(callback=self._handle_mark_prices)
+            logger.info("📡 Stream de mark prices iniciado")
+        except Exception as e:
+            logger.warning(f"⚠️ Error iniciando stream de mark prices, se usa polling: {e}")
+
+    def _handle_mark_prices(self, msg):
+        """Callback del websocket de mark prices (stream combinado: {'stream': ..., 'data': [...]})"""
+        if isinstance(msg, dict):
+            if msg.get('e') == 'error':
+                logger.warning(f"⚠️ Error en stream de mark prices: {msg.get('m')}")
+                return
+            msg = msg.get('data')
+        if not isinstance(msg, list):
+            return
+        if not self.last_stream_mark:
+            logger.info(f"📡 Stream de mark prices recibiendo datos ({len(msg)} símbolos)")
+        self.last_stream_mark = time.time()
+        for item in msg:
+            self.risk.on_mark_price(item['s'], float(item['p']))
+
+    def _mark_price_poller(self):
+        """Mark prices en una sola llamada si el stream no está activo; balance y posiciones cada RISK_ACCOUNT_SYNC"""
+        last_sync = time.time()
+        while True:
+            # Un TP/SL ejecutado entre ciclos no debe seguir valorándose contra el balance anterior
+            if time.time() - last_sync >= RISK_ACCOUNT_SYNC:
+                last_sync = time.time()
+                account_info = self.get_account_info()
+                if account_info:
+                    self.risk.sync_account(account_info)
+            if time.time() - self.last_stream_mark > 3 * RISK_POLL_INTERVAL:
+                try:
+                    for item in self.client.futures_mark_price():
+                        self.risk.on_mark_price(item['symbol'], float(item['markPrice']))
+                except Exception as e:
+                    logger.warning(f"⚠️ Error consultando mark prices: {e}")
+            time.sleep(RISK_POLL_INTERVAL)
+
+    def _on_risk_breach(self, state: dict):
+        """Acción inmediata al alcanzar el límite diario (desde el hilo de mark prices)"""
+        self.is_paused = True
+        msg = f"⚠️ PAUSA - Límite diario alcanzado: {state['daily_return']*100:.2f}%"
+        if RISK_ACTION == 'flatten':
+            with self.trade_lock:
+                self._close_all_positions()
+            msg += "\n🧹 Posiciones cerradas"
+        self._notify(msg)
+
+    def _setup_leverage(self, executor: Optional[ThreadPoolExecutor] = None, skip: Optional[set] = None):
+        """Configura leverage para todos los pares (excepto los de `skip`), en paralelo si hay executor"""
+        pairs = [pair for pair in TRADING_PAIRS if not skip or pair not in skip]
+        list(executor.map(self._set_pair_leverage, pairs) if executor else map(self._set_pair_leverage, pairs))
+
+    def _set_pair_leverage(self, pair: str):
+        """Configura DEFAULT_LEVERAGE para un par"""
+        try:
+            self.client.futures_change_leverage(
+                symbol=pair, 
+                leverage=DEFAULT_LEVERAGE
+            )
+            logger.info(f"✅ Leverage {DEFAULT_LEVERAGE}x configurado para {pair}")
+        except Exception as e:
+            logger.warning(f"⚠️ Error configurando leverage para {pair}: {e}")
+    
+    def get_market_data(self, pairs: Optional[List[str]] = None) -> Dict[str, dict]:
+        """Obtiene datos de mercado e indicadores para los pares (por defecto TRADING_PAIRS)"""
+        pairs = pairs or TRADING_PAIRS
+        klines_by_pair = {}
+
+        # Precio actual de todos los pares en una sola llamada
+        try:
+            prices = {t['symbol']: float(t['price']) for t in self.client.futures_symbol_ticker()}
+        except Exception as e:
+            logger.error(f"❌ Error obteniendo precios: {e}")
+            return {pair: None for pair in pairs}
+
+        def fetch_klines(pair: str):
+            # Obtener velas (klines) - últimas 100 velas de 15min
+            return self.client.futures_klines(
+                symbol=pair,
+                interval='15m',
+                limit=100
+            )
+
+        with ThreadPoolExecutor(max_workers=MARKET_DATA_WORKERS) as executor:
+            # Funding y order book de todos los símbolos, en paralelo con las velas
+            features_future = executor.submit(self._bulk_features) if MARKET_FEATURES else None
+            futures = {pair: executor.submit(fetch_klines, pair) for pair in pairs}
+            for pair, future in futures.items():
+                try:
+                    klines_by_pair[pair] = future.result()
+                    if pair not in prices:
+                        raise ValueError("sin precio en el ticker")
+                except Exception as e:
+                    logger.error(f"❌ Error obteniendo datos de {pair}: {e}")
+                    klines_by_pair.pop(pair, None)
+
+        market_data = self._build_market_data(pairs, prices, klines_by_pair)
+        if features_future:
             try:
-                self.client.futures_change_leverage(
-                    symbol=pair, 
-                    leverage=DEFAULT_LEVERAGE
-                )
-                logger.info(f"✅ Leverage {DEFAULT_LEVERAGE}x configurado para {pair}")
+                add_features(market_data, *features_future.result())
             except Exception as e:
-                logger.warning(f"⚠️ Error configurando leverage para {pair}: {e}")
-    
-    def get_market_data(self) -> Dict[str, dict]:
-        """Obtiene datos de mercado e indicadores para todos los pares"""
+                logger.warning(f"⚠️ Error obteniendo funding/order book: {e}")
+        return market_data
+
+    def _bulk_features(self) -> tuple:
+        """(funding, book) de todos los símbolos: una llamada por endpoint y TTL"""
+        funding = self.feature_cache.get('funding', FUNDING_TTL)
+        if funding is None:
+            funding = parse_premium_index(self.client.futures_mark_price())
+            self.feature_cache.put('funding', funding)
+        book = self.feature_cache.get('book', BOOK_TTL)
+        if book is None:
+            book = parse_book_ticker(self.client.futures_orderbook_ticker())
+            self.feature_cache.put('book', book)
+        return funding, book
+
+    def add_open_interest(self, market_data: dict):
+        """Open interest solo de los pares del prompt (no hay endpoint bulk; TTL largo)"""
+        open_interest = {}
+        for pair, data in market_data.items():
+            if not data:
+                continue
+            contracts = self.feature_cache.get(('open_interest', pair), OPEN_INTEREST_TTL)
+            if contracts is None:
+                try:
+                    contracts = float(self.client.futures_open_interest(symbol=pair)['openInterest'])
+                except Exception as e:
+                    logger.warning(f"⚠️ Error obteniendo open interest de {pair}: {e}")
+                    continue
+                self.feature_cache.put(('open_interest', pair), contracts)
+            open_interest[pair] = contracts
+        add_open_interest(market_data, open_interest)
+
+    def _build_market_data(self, pairs: List[str], prices: Dict[str, float], klines_by_pair: Dict[str, list]) -> Dict[str, dict]:
+        """Calcula indicadores y arma el dict de market_data a partir de velas y precios"""
+        from indicators import MIN_CANDLES, compute_indicators, is_complete, klines_to_array
+
         market_data = {}
-        
-        for pair in TRADING_PAIRS:
-            try:
-                # Obtener velas (klines) - últimas 100 velas de 15min
-                klines = self.client.futures_klines(
-                    symbol=pair,
-                    interval='15m',
-                    limit=100
-                )
-                
-                # Convertir a DataFrame
-                df = pd.DataFrame(klines, columns=[
-                    'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                    'close_time', 'quote_volume', 'trades', 'taker_buy_base',
-                    'taker_buy_quote', 'ignore'
-                ])
-                
-                df['close'] = pd.to_numeric(df['close'])
-                df['high'] = pd.to_numeric(df['high'])
-                df['low'] = pd.to_numeric(df['low'])
-                df['volume'] = pd.to_numeric(df['volume'])
-                
-                # Calcular indicadores con ta
-                df['rsi'] = RSIIndicator(df['close'], window=14).rsi()
-                macd_indicator = MACD(df['close'], window_fast=12, window_slow=26, window_sign=9)
-                df['macd'] = macd_indicator.macd()
-                df['macd_signal'] = macd_indicator.macd_signal()
-                df['ema_20'] = EMAIndicator(df['close'], window=20).ema_indicator()
-                df['ema_50'] = EMAIndicator(df['close'], window=50).ema_indicator()
-                
-                # Precio actual
-                ticker = self.client.futures_symbol_ticker(symbol=pair)
-                current_price = float(ticker['price'])
-                
-                # Último valor de indicadores
-                market_data[pair] = {
-                    'price': current_price,
-                    'rsi': round(df['rsi'].iloc[-1], 2),
-                    'macd': round(df['macd'].iloc[-1], 4),
-                    'macd_signal': round(df['macd_signal'].iloc[-1], 4),
-                    'ema_20': round(df['ema_20'].iloc[-1], 2),
-                    'ema_50': round(df['ema_50'].iloc[-1], 2),
-                    'volume_24h': round(df['volume'].sum(), 2),
-                    'trend': 'BULLISH' if df['ema_20'].iloc[-1] > df['ema_50'].iloc[-1] else 'BEARISH'
-                }
-
-                # Logging de diagnóstico
-                logger.info(f"📊 MARKET DATA: {pair}: price=${current_price:,.2f}, vol=${market_data[pair]['volume_24h']:,.2f}")
-                logger.info(f"📈 INDICATORS: {pair}: RSI={market_data[pair]['rsi']}, MACD={market_data[pair]['macd']}, Signal={market_data[pair]['macd_signal']}, EMA20=${market_data[pair]['ema_20']:,.2f}, EMA50=${market_data[pair]['ema_50']:,.2f}")
 
-            except Exception as e:
-                logger.error(f"❌ Error obteniendo datos de {pair}: {e}")
+        # Listados nuevos: con poco historial los indicadores salen NaN y no se pueden puntuar
+        short = [pair for pair, klines in klines_by_pair.items() if len(klines) < MIN_CANDLES]
+        if short:
+            logger.warning(f"⚠️ Historial insuficiente (<{MIN_CANDLES} velas), se omiten: {', '.join(short)}")
+            klines_by_pair = {pair: klines for pair, klines in klines_by_pair.items() if pair not in short}
+
+        # Calcular indicadores: en el pool de procesos o en este mismo proceso
+        indicators = None
+        if self.indicator_pool:
+            try:
+                indicators = self.indicator_pool.compute(klines_by_pair)
+            except BrokenProcessPool as e:
+                logger.error(f"❌ Pool de indicadores roto ({e}): este ciclo se calcula en el proceso")
+                self.indicator_pool.restart()
+        if indicators is None:
+            indicators = {}
+            for pair, klines in klines_by_pair.items():
+                try:
+                    indicators[pair] = compute_indicators(klines_to_array(klines))
+                except Exception as e:
+                    logger.error(f"❌ Error calculando indicadores de {pair}: {e}")
+                    indicators[pair] = None
+
+        for pair in pairs:
+            if not indicators.get(pair):
                 market_data[pair] = None
-        
+                continue
+            if not is_complete(indicators[pair]):
+                logger.warning(f"⚠️ Indicadores incompletos (NaN) en {pair}, se omite")
+                market_data[pair] = None
+                continue
+
+            current_price = prices[pair]
+            # La última kline es la vela en curso: la anterior es la última cerrada
+            last_closed = klines_by_pair[pair][-2]
+            market_data[pair] = {
+                'price': current_price,
+                'close': float(last_closed[4]),
+                'candle_time': last_closed[0],
+                **indicators[pair]
+            }
+
+            # Logging de diagnóstico (una línea por par)
+            data = market_data[pair]
+            logger.info(
+                f"📊 MARKET DATA: {pair}: price=${current_price:,.2f}, vol=${data['volume_24h']:,.2f}, "
+                f"RSI={data['rsi']}, MACD={data['macd']}, Signal={data['macd_signal']}, "
+                f"EMA20=${data['ema_20']:,.2f}, EMA50=${data['ema_50']:,.2f}"
+            )
+
         return market_data
     
+    def _load_exchange_info(self):
+        """Carga (una vez) los perpetuos USDT operables y su precisión de cantidad/precio"""
+        if self.symbol_filters:
+            return
+        self._parse_exchange_info(self.client.futures_exchange_info())
+
+    def _parse_exchange_info(self, exchange_info: dict):
+        def decimals(step: str) -> int:
+            step = step.rstrip('0')
+            return len(step.split('.')[1]) if '.' in step else 0
+
+        for info in exchange_info['symbols']:
+            if info['contractType'] != 'PERPETUAL' or info['quoteAsset'] != 'USDT' or info['status'] != 'TRADING':
+                continue
+            filters = {f['filterType']: f for f in info['filters']}
+            self.symbol_filters[info['symbol']] = {
+                'quantity': decimals(filters['LOT_SIZE']['stepSize']),
+                'price': decimals(filters['PRICE_FILTER']['tickSize'])
+            }
+
+    def screen_universe(self) -> Dict[str, dict]:
+        """Etapa 1 del screener: perpetuos rankeados por volumen/volatilidad con el ticker 24h (1 llamada)"""
+        self._load_exchange_info()
+        universe = rank_universe(self.client.futures_ticker(), self.symbol_filters, SCREENER_UNIVERSE_SIZE)
+        logger.info(f"🔎 Screener: universo de {len(universe)} pares")
+        return universe
+
+    def select_prompt_pairs(self, market_data: dict, universe: Dict[str, dict]) -> dict:
+        """Etapa 2 del screener: top-K candidatos del modo + posiciones abiertas"""
+        top_k = get_mode_config(TRADING_MODE)['screener_top_k']
+        scores = score_candidates(market_data, universe)
+        selected = select_candidates(market_data, scores, self.positions, top_k)
+        logger.info(f"🔎 Candidatos para la IA: {', '.join(f'{p} ({scores[p]:.2f})' for p in selected)}")
+        return selected
+
     def get_account_info(self) -> dict:
         """Obtiene información de la cuenta"""
         try:
             account = self.client.futures_account()
             positions = self.client.futures_position_information()
-            
-            balance = float(account['totalWalletBalance'])
-            unrealized_pnl = float(account['totalUnrealizedProfit'])
-            available = float(account['availableBalance'])
-            
-            # Posiciones abiertas
-            open_positions = []
-            for pos in positions:
-                if float(pos['positionAmt']) != 0:
-                    open_positions.append({
-                        'symbol': pos['symbol'],
-                        'side': 'LONG' if float(pos['positionAmt']) > 0 else 'SHORT',
-                        'size': abs(float(pos['positionAmt'])),
-                        'entry_price': float(pos['entryPrice']),
-                        'unrealized_pnl': float(pos['unRealizedProfit']),
-                        'leverage': int(pos['leverage'])
-                    })
-            
-            return {
-                'balance': round(balance, 2),
-                'unrealized_pnl': round(unrealized_pnl, 2),
-                'available': round(available, 2),
-                'equity': round(balance + unrealized_pnl, 2),
-                'open_positions': open_positions,
-                'position_count': len(open_positions)
-            }
+            return self._parse_account(account, positions)
             
         except Exception as e:
             logger.error(f"❌ Error obteniendo cuenta: {e}")
             return None
+
+    def _parse_account(self, account: dict, positions: List[dict]) -> dict:
+        """Resume futures_account + futures_position_information"""
+        balance = float(account['totalWalletBalance'])
+        unrealized_pnl = float(account['totalUnrealizedProfit'])
+        available = float(account['availableBalance'])
+        
+        # Posiciones abiertas
+        open_positions = []
+        for pos in positions:
+            if float(pos['positionAmt']) != 0:
+                open_positions.append({
+                    'symbol': pos['symbol'],
+                    'side': 'LONG' if float(pos['positionAmt']) > 0 else 'SHORT',
+                    'size': abs(float(pos['positionAmt'])),
+                    'entry_price': float(pos['entryPrice']),
+                    'unrealized_pnl': float(pos['unRealizedProfit']),
+                    'leverage': int(pos['leverage'])
+                })
+        
+        return {
+            'balance': round(balance, 2),
+            'unrealized_pnl': round(unrealized_pnl, 2),
+            'available': round(available, 2),
+            'equity': round(balance + unrealized_pnl, 2),
+            'open_positions': open_positions,
+            'position_count': len(open_positions)
+        }
     
     def build_prompt(self, market_data: dict, account_info: dict) -> str:
         """Construye el prompt para DeepSeek usando el modo configurado"""
 
         # Obtener system prompt del modo actual (Monk Mode)
-        system_prompt = get_system_prompt(TRADING_MODE)
+        system_prompt = get_system_prompt(TRADING_MODE, SCREENER_ENABLED)
 
         # Market data section
         market_section = "\n\nCURRENT MARKET DATA (15-min candles):\n"
+        if SCREENER_ENABLED:
+            coins = ', '.join(pair.replace('USDT', '') for pair, data in market_data.items() if data)
+            market_section += f"Screened candidates this cycle (tradable USDT perpetuals): {coins}\n"
         for pair, data in market_data.items():
             if data:
                 market_section += f"""
@@ -236,7 +535,7 @@ class TradingBot:
   MACD: {data['macd']} (Signal: {data['macd_signal']})
   EMA20: ${data['ema_20']:,.2f} | EMA50: ${data['ema_50']:,.2f}
   Trend: {data['trend']}
-"""
+""" + format_features(data)
 
         # Account section - actualizado para Monk Mode (max 3 posiciones)
         account_section = f"""
@@ -247,12 +546,18 @@ ACCOUNT STATUS:
   Available: ${account_info['available']:,.2f}
   Open Positions: {account_info['position_count']}/{MAX_POSITIONS}
 """
+        if self.risk.tripped:
+            account_section += "  Daily loss limit reached: new entries are blocked until the next UTC day (close or hold only)\n"
         
         # Open positions detail
         if account_info['open_positions']:
             account_section += "\nCURRENT POSITIONS:\n"
             for pos in account_info['open_positions']:
                 account_section += f"  {pos['symbol']}: {pos['side']} {pos['size']} @ ${pos['entry_price']:,.2f} (PnL: ${pos['unrealized_pnl']:,.2f})\n"
+                # Las invalidaciones que no se pueden evaluar localmente las revisa la IA
+                condition = self.positions.get(pos['symbol'], {}).get('invalidation_condition')
+                if not self.invalidations.is_empty(condition) and not self.invalidations.get(condition, pos['symbol']):
+                    account_section += f"    Invalidation (check, close if met): {condition}\n"
         else:
             account_section += "\nCURRENT POSITIONS: None\n"
         
@@ -261,32 +566,45 @@ ACCOUNT STATUS:
         
         return full_prompt
     
+    def _deepseek_request(self, prompt: str) -> dict:
+        """Payload y headers de la consulta a DeepSeek via OpenRouter"""
+        payload = {
+            "model": DEEPSEEK_MODEL,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.3,  # Bajo para decisiones más consistentes
+            "max_tokens": 1000
+        }
+        headers = {
+            "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://github.com/trading-bot",
+            "X-Title": "Alpha Arena Trading Bot"
+        }
+        return {'payload': payload, 'headers': headers}
+
+    def _log_payload(self, payload: dict):
+        """Hash y tamaño del payload en cada ciclo; el contenido completo solo en los muestreados"""
+        fields = self.payload_sampler.sample(payload)
+        text = PayloadSampler.describe(fields) if LOG_FORMAT == 'text' else fields['payload_sha']
+        logger.info(f"🧠 DEEPSEEK PAYLOAD: {text}", extra=fields)
+
     def query_deepseek(self, prompt: str) -> Optional[dict]:
         """Consulta DeepSeek via OpenRouter"""
+        content = ''
+        self.last_llm_response = ''
         try:
-            # Logging del payload completo
-            payload = {
-                "model": "deepseek/deepseek-chat",  # DeepSeek V3
-                "messages": [
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.3,  # Bajo para decisiones más consistentes
-                "max_tokens": 1000
-            }
-            logger.info(f"🧠 DEEPSEEK PAYLOAD: {json.dumps(payload, indent=2)}")
+            request = self._deepseek_request(prompt)
+            self._log_payload(request['payload'])
 
             # Medir tiempo de respuesta
             start_time = time.time()
 
             response = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                    "Content-Type": "application/json",
-                    "HTTP-Referer": "https://github.com/trading-bot",
-                    "X-Title": "Alpha Arena Trading Bot"
-                },
-                json=payload,
+                OPENROUTER_URL,
+                headers=request['headers'],
+                json=request['payload'],
                 timeout=60
             )
 
@@ -296,18 +614,10 @@ ACCOUNT STATUS:
             if response.status_code == 200:
                 result = response.json()
                 content = result['choices'][0]['message']['content']
+                self.last_llm_response = content
                 
                 # Limpiar y parsear JSON
-                content = content.strip()
-                if content.startswith('```json'):
-                    content = content[7:]
-                if content.startswith('```'):
-                    content = content[3:]
-                if content.endswith('```'):
-                    content = content[:-3]
-                content = content.strip()
-                
-                decision = json.loads(content)
+                decision = parse_decision(content)
                 logger.info(f"🧠 DeepSeek decisión: {decision}")
                 return decision
             else:
@@ -322,14 +632,73 @@ ACCOUNT STATUS:
             logger.error(f"❌ Error consultando DeepSeek: {e}")
             return None
     
-    def _save_trade(self, action: str, symbol: str, reasoning: str, price: float = 0, quantity: float = 0):
-        """Guarda trade en historial"""
+    def _review_decision(self, prompt: str, decision, market_data: dict, account_info: dict,
+                         positions: Optional[dict] = None):
+        """Avisa de decisiones inválidas y graba el ciclo para replay.py (si RECORD_FILE está configurado)
+
+        `positions` permite pasar una copia cuando se llama fuera del hilo/loop que las modifica.
+        Solo diagnóstico: un fallo aquí se registra y nunca bloquea la ejecución del ciclo.
+        """
+        for d in as_list(decision):
+            try:
+                errors = validate_decision(d, market_data)
+            except Exception as e:
+                errors = [f"error validando: {e!r}"]
+            if errors:
+                logger.warning(f"⚠️ Decisión con problemas: {'; '.join(errors)}")
+        if self.recorder:
+            try:
+                self.recorder.record(
+                    prompt, self.last_llm_response, decision, market_data, account_info,
+                    self.positions if positions is None else positions, mode=TRADING_MODE, model=DEEPSEEK_MODEL
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ Error grabando el ciclo: {e!r}")
+
+    def _triggered_invalidations(self, market_data: dict) -> List[tuple]:
+        """(symbol, condición) de las posiciones cuya invalidación se cumple en la última vela cerrada"""
+        triggered = []
+        for symbol, position in list(self.positions.items()):
+            condition = position.get('invalidation_condition')
+            data = market_data.get(symbol)
+            if self.invalidations.is_empty(condition) or not data:
+                continue
+            predicate = self.invalidations.get(condition, symbol)
+            # Una evaluación por vela cerrada; las no interpretables quedan para la IA
+            if not predicate or position.get('invalidation_checked') == data['candle_time']:
+                continue
+            position['invalidation_checked'] = data['candle_time']
+
+            try:
+                if predicate(data['closed'], data['prev_closed']):
+                    logger.info(f"❌ Invalidación cumplida en {symbol}: {condition}")
+                    triggered.append((symbol, condition))
+            except (KeyError, TypeError) as e:
+                logger.warning(f"⚠️ Error evaluando invalidación de {symbol} ({condition}): {e}")
+        return triggered
+
+    def _invalidation_close(self, symbol: str, condition: str) -> dict:
+        return {
+            'signal': 'close',
+            'coin': symbol,
+            'justification': f"Invalidación cumplida: {condition}"
+        }
+
+    def check_invalidations(self, market_data: dict):
+        """Cierra las posiciones cuya invalidación se cumple en la última vela cerrada"""
+        for symbol, condition in self._triggered_invalidations(market_data):
+            self.execute_trade(self._invalidation_close(symbol, condition))
+
+    def _save_trade(self, action: str, symbol: str, reasoning: str, price: float = 0, quantity: float = 0,
+                    execution: Optional[dict] = None):
+        """Guarda trade en historial (con el reporte de ejecución: slippage, latencia, fills)"""
         self.trade_history.append({
             'action': action,
             'symbol': symbol,
             'reasoning': reasoning,
             'price': price,
             'quantity': quantity,
+            'execution': execution,
             'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M")
         })
         # Mantener solo últimos 50 trades
@@ -343,46 +712,200 @@ ACCOUNT STATUS:
             return coin
         return f"{coin}USDT"
 
+    def _parse_trade(self, decision: dict) -> dict:
+        """Normaliza una decisión de DeepSeek (formato Alpha Arena)"""
+        coin = decision.get('coin', '')
+        return {
+            'signal': decision.get('signal', 'hold'),
+            'symbol': self._coin_to_symbol(coin) if coin else '',
+            'justification': decision.get('justification', 'No reason provided'),
+            'confidence': decision.get('confidence', 0),
+            'quantity': decision.get('quantity', 0),
+            'leverage': decision.get('leverage', DEFAULT_LEVERAGE),
+            'tp_price': decision.get('profit_target', 0),
+            'sl_price': decision.get('stop_loss', 0),
+            'invalidation': decision.get('invalidation_condition', ''),
+            'risk_usd': decision.get('risk_usd')
+        }
+
+    def _skip_trade(self, trade: dict) -> bool:
+        """True si la decisión no requiere órdenes (hold, límite diario o poca confianza)"""
+        signal = trade['signal']
+        justification = trade['justification']
+
+        if signal == 'hold':
+            logger.info(f"⏸️ HOLD - {justification}")
+            return True
+
+        # Límite diario alcanzado: solo se permite cerrar
+        if signal in ['buy_to_enter', 'sell_to_enter'] and self.risk.tripped:
+            logger.info(f"⏸️ SKIP - Límite diario alcanzado. {justification}")
+            return True
+
+        # Verificar confianza mínima
+        if signal in ['buy_to_enter', 'sell_to_enter'] and trade['confidence'] < MIN_CONFIDENCE:
+            logger.info(f"⏸️ SKIP - Confianza {trade['confidence']*100:.0f}% < {MIN_CONFIDENCE*100:.0f}% requerida. {justification}")
+            return True
+
+        return False
+
+    def _entry_quantity(self, trade: dict, available: float, current_price: float) -> float:
+        """Cantidad de la IA o, si no viene, calculada con risk_usd (o 10% del disponible)"""
+        quantity = trade['quantity']
+        if quantity <= 0:
+            risk_usd = trade['risk_usd'] if trade['risk_usd'] is not None else available * 0.10
+            quantity = (risk_usd * trade['leverage']) / current_price
+        return self._round_quantity(trade['symbol'], quantity)
+
+    def _record_open(self, trade: dict, action: str, current_price: float, quantity: float, leverage: int,
+                     execution: Optional[dict] = None) -> str:
+        """Registra la apertura (historial y posiciones) y devuelve el mensaje para Telegram"""
+        symbol = trade['symbol']
+        tp_price, sl_price, invalidation = trade['tp_price'], trade['sl_price'], trade['invalidation']
+        logger.info(f"✅ {action} ejecutado: {symbol} x{leverage} - Cantidad: {quantity}")
+
+        # Guardar en historial
+        self._save_trade(action, symbol, trade['justification'], current_price, quantity, execution)
+        self.positions[symbol] = {
+            'side': 'LONG' if action == 'OPEN_LONG' else 'SHORT',
+            'quantity': quantity,
+            'entry_price': current_price,
+            'leverage': leverage,
+            'profit_target': tp_price,
+            'stop_loss': sl_price,
+            'invalidation_condition': invalidation,
+            # La vela con la que la IA decidió entrar no cuenta: solo las que cierran después
+            'invalidation_checked': self.candle_times.get(symbol),
+            'opened_at': datetime.now().strftime("%Y-%m-%d %H:%M")
+        }
+
+        msg = f"🟢 *{action}*\n"
+        msg += f"📍 {symbol} @ ${current_price:,.2f}\n"
+        msg += f"📊 Size: {quantity} | Leverage: {leverage}x\n"
+        if tp_price and sl_price:
+            msg += f"🎯 TP: ${tp_price:,.2f} | SL: ${sl_price:,.2f}\n"
+        if invalidation:
+            msg += f"❌ Invalidación: {invalidation}\n"
+        if execution:
+            msg += f"{describe_report(execution)}\n"
+        msg += f"\n💬 _{trade['justification']}_"
+        return msg
+
+    def _record_close(self, symbol: str, justification: str, entry_price: float, quantity: float,
+                      execution: Optional[dict] = None, remaining: float = 0) -> str:
+        """Registra el cierre (total o parcial si queda `remaining`) y devuelve el mensaje para Telegram"""
+        logger.info(f"✅ Posición cerrada: {symbol}" + (f" (parcial, quedan {remaining})" if remaining > 0 else ""))
+
+        # Guardar en historial
+        self._save_trade('CLOSE', symbol, justification, entry_price, quantity, execution)
+        if remaining > 0 and symbol in self.positions:
+            self.positions[symbol]['quantity'] = remaining
+        else:
+            self.positions.pop(symbol, None)
+
+        msg = f"🔴 *CLOSE*\n"
+        msg += f"📍 {symbol}\n"
+        if remaining > 0:
+            msg += f"⚠️ Cierre parcial: quedan {remaining} abiertos\n"
+        if execution:
+            msg += f"{describe_report(execution)}\n"
+        msg += f"\n💬 _{justification}_"
+        return msg
+
+    def _order_request(self, symbol: str, side: str, quantity: float, reduce_only: bool,
+                       bid: float = 0, ask: float = 0, market: bool = False) -> dict:
+        """Parámetros de futures_create_order para una orden hija (límite según EXECUTION_STYLE o mercado)"""
+        params = {'symbol': symbol, 'side': side, 'quantity': quantity, 'newOrderRespType': 'RESULT'}
+        if reduce_only:
+            params['reduceOnly'] = True
+        if market or EXECUTION_STYLE == 'market':
+            params['type'] = ORDER_TYPE_MARKET
+        else:
+            params['type'] = ORDER_TYPE_LIMIT
+            params['price'] = self._round_price(symbol, limit_price(EXECUTION_STYLE, side, bid, ask))
+            params['timeInForce'] = TIME_IN_FORCE_GTX if EXECUTION_STYLE == 'post_only' else TIME_IN_FORCE_IOC
+        return params
+
+    def _execute_order(self, symbol: str, side: str, quantity: float,
+                       decision_price: Optional[float] = None, reduce_only: bool = False) -> dict:
+        """Ejecuta `quantity` con EXECUTION_STYLE (troceada si supera EXECUTION_SLICE_USD) y devuelve el reporte"""
+        started = time.time()
+        if decision_price is None:
+            book = self.client.futures_orderbook_ticker(symbol=symbol)
+            decision_price = (float(book['bidPrice']) + float(book['askPrice'])) / 2
+
+        children = child_quantities(quantity, decision_price, EXECUTION_SLICE_USD, self._quantity_decimals(symbol))
+        fills, error = [], None
+        for child in children:
+            try:
+                self._execute_child(symbol, side, child, reduce_only, fills)
+            except Exception as e:
+                # Lo ya llenado se reporta igual: la posición y el TP/SL se registran con esa cantidad
+                logger.error(f"❌ Error en orden de {symbol} tras {len(fills)} fill(s): {e!r}")
+                error = e
+                break
+        if error and not fills:
+            raise error
+
+        report = fill_report(EXECUTION_STYLE, side, decision_price, fills, (time.time() - started) * 1000,
+                             len(children), repr(error) if error else None)
+        logger.info(f"{describe_report(report)} ({symbol} {side} {report['filled_qty']} @ {report['avg_price']})")
+        return report
+
+    def _execute_child(self, symbol: str, side: str, quantity: float, reduce_only: bool, fills: List[tuple]):
+        """Una orden hija: límite (post-only/IOC) y lo no llenado a mercado. Añade a `fills` (qty, precio, liquidez)
+        a medida que se ejecuta, para no perderlos si una orden posterior falla"""
+        remaining = quantity
+        if EXECUTION_STYLE != 'market':
+            book = self.client.futures_orderbook_ticker(symbol=symbol)
+            order = self.client.futures_create_order(**self._order_request(
+                symbol, side, quantity, reduce_only, float(book['bidPrice']), float(book['askPrice'])
+            ))
+            if EXECUTION_STYLE == 'post_only':
+                order = self._await_limit_order(symbol, order)
+            executed, avg_price = order_fill(order)
+            if executed:
+                fills.append((executed, avg_price, 'maker' if EXECUTION_STYLE == 'post_only' else 'taker'))
+            remaining = self._round_quantity(symbol, quantity - executed)
+
+        if remaining > 0:
+            order = self.client.futures_create_order(**self._order_request(symbol, side, remaining, reduce_only, market=True))
+            if order.get('status') != 'FILLED':
+                order = self.client.futures_get_order(symbol=symbol, orderId=order['orderId'])
+            executed, avg_price = order_fill(order)
+            if executed:
+                fills.append((executed, avg_price, 'taker'))
+
+    def _await_limit_order(self, symbol: str, order: dict) -> dict:
+        """Espera hasta EXECUTION_TIMEOUT a la orden post-only y cancela el resto"""
+        deadline = time.time() + EXECUTION_TIMEOUT
+        while order['status'] not in FINAL_STATUSES and time.time() < deadline:
+            time.sleep(EXECUTION_POLL)
+            order = self.client.futures_get_order(symbol=symbol, orderId=order['orderId'])
+        if order['status'] not in FINAL_STATUSES:
+            try:
+                order = self.client.futures_cancel_order(symbol=symbol, orderId=order['orderId'])
+            except Exception:
+                # Se llenó entre la última consulta y la cancelación
+                order = self.client.futures_get_order(symbol=symbol, orderId=order['orderId'])
+        return order
+
     def execute_trade(self, decision: dict) -> bool:
         """Ejecuta la orden basada en la decisión de DeepSeek"""
         try:
-            # Nuevo formato Alpha Arena
-            signal = decision.get('signal', 'hold')
-            coin = decision.get('coin', '')
-            symbol = self._coin_to_symbol(coin) if coin else ''
-            justification = decision.get('justification', 'No reason provided')
-            confidence = decision.get('confidence', 0)
-            quantity = decision.get('quantity', 0)
-            leverage = decision.get('leverage', DEFAULT_LEVERAGE)
-            tp_price = decision.get('profit_target', 0)
-            sl_price = decision.get('stop_loss', 0)
-            invalidation = decision.get('invalidation_condition', '')
-
-            if signal == 'hold':
-                logger.info(f"⏸️ HOLD - {justification}")
-                return True
+            trade = self._parse_trade(decision)
+            signal, symbol = trade['signal'], trade['symbol']
 
-            # Verificar confianza mínima
-            if signal in ['buy_to_enter', 'sell_to_enter'] and confidence < MIN_CONFIDENCE:
-                logger.info(f"⏸️ SKIP - Confianza {confidence*100:.0f}% < {MIN_CONFIDENCE*100:.0f}% requerida. {justification}")
+            if self._skip_trade(trade):
                 return True
 
             if signal in ['buy_to_enter', 'sell_to_enter']:
                 account = self.get_account_info()
+                ticker = self.client.futures_symbol_ticker(symbol=symbol)
+                current_price = float(ticker['price'])
 
-                # Usar quantity de la IA o calcular
-                if quantity <= 0:
-                    # Calcular basado en risk_usd o 10% del disponible
-                    risk_usd = decision.get('risk_usd', account['available'] * 0.10)
-                    ticker = self.client.futures_symbol_ticker(symbol=symbol)
-                    current_price = float(ticker['price'])
-                    quantity = (risk_usd * leverage) / current_price
-                else:
-                    ticker = self.client.futures_symbol_ticker(symbol=symbol)
-                    current_price = float(ticker['price'])
-
-                # Redondear cantidad
-                quantity = self._round_quantity(symbol, quantity)
+                # Usar quantity de la IA o calcular, y redondear
+                quantity = self._entry_quantity(trade, account['available'], current_price)
 
                 if quantity <= 0:
                     logger.warning(f"⚠️ Cantidad calculada es 0 para {symbol}")
@@ -393,37 +916,24 @@ ACCOUNT STATUS:
                 action = 'OPEN_LONG' if signal == 'buy_to_enter' else 'OPEN_SHORT'
 
                 # Configurar leverage
-                leverage = min(leverage, MAX_LEVERAGE)
+                leverage = min(trade['leverage'], MAX_LEVERAGE)
                 self.client.futures_change_leverage(symbol=symbol, leverage=leverage)
 
-                # Orden de mercado
-                order = self.client.futures_create_order(
-                    symbol=symbol,
-                    side=side,
-                    type=ORDER_TYPE_MARKET,
-                    quantity=quantity
-                )
-
-                logger.info(f"✅ {action} ejecutado: {symbol} x{leverage} - Cantidad: {quantity}")
+                # Orden según EXECUTION_STYLE (mercado, post-only o IOC)
+                execution = self._execute_order(symbol, side, quantity, current_price)
+                quantity = execution['filled_qty']
+                if quantity <= 0:
+                    logger.warning(f"⚠️ Orden sin ejecutar para {symbol}")
+                    return False
 
-                # Guardar en historial
-                self._save_trade(action, symbol, justification, current_price, quantity)
+                msg = self._record_open(trade, action, execution['avg_price'] or current_price, quantity, leverage, execution)
 
                 # Configurar TP/SL
-                if tp_price and sl_price:
-                    self._set_tp_sl(symbol, action, quantity, tp_price, sl_price)
+                if trade['tp_price'] and trade['sl_price']:
+                    self._set_tp_sl(symbol, action, quantity, trade['tp_price'], trade['sl_price'])
 
                 # Notificar
-                msg = f"🟢 *{action}*\n"
-                msg += f"📍 {symbol} @ ${current_price:,.2f}\n"
-                msg += f"📊 Size: {quantity} | Leverage: {leverage}x\n"
-                if tp_price and sl_price:
-                    msg += f"🎯 TP: ${tp_price:,.2f} | SL: ${sl_price:,.2f}\n"
-                if invalidation:
-                    msg += f"❌ Invalidación: {invalidation}\n"
-                msg += f"\n💬 _{justification}_"
                 self._notify(msg)
-
                 return True
 
             elif signal == 'close':
@@ -436,24 +946,12 @@ ACCOUNT STATUS:
                         quantity = abs(pos_amt)
                         entry_price = float(pos['entryPrice'])
 
-                        order = self.client.futures_create_order(
-                            symbol=symbol,
-                            side=side,
-                            type=ORDER_TYPE_MARKET,
-                            quantity=quantity,
-                            reduceOnly=True
-                        )
-
-                        logger.info(f"✅ Posición cerrada: {symbol}")
-
-                        # Guardar en historial
-                        self._save_trade('CLOSE', symbol, justification, entry_price, quantity)
+                        execution = self._execute_order(symbol, side, quantity, reduce_only=True)
+                        filled = execution['filled_qty']
+                        remaining = self._round_quantity(symbol, quantity - filled)
 
                         # Notificar
-                        msg = f"🔴 *CLOSE*\n"
-                        msg += f"📍 {symbol}\n"
-                        msg += f"\n💬 _{justification}_"
-                        self._notify(msg)
+                        self._notify(self._record_close(symbol, trade['justification'], entry_price, filled, execution, remaining))
                         return True
 
                 logger.warning(f"⚠️ No hay posición abierta en {symbol}")
@@ -502,8 +1000,8 @@ ACCOUNT STATUS:
         except Exception as e:
             logger.error(f"❌ Error configurando TP/SL: {e}")
     
-    def _round_quantity(self, symbol: str, quantity: float) -> float:
-        """Redondea cantidad según las reglas del par"""
+    def _quantity_decimals(self, symbol: str) -> int:
+        """Decimales del step de cantidad del par"""
         # Precisiones comunes (ajustar según necesidad)
         precisions = {
             'BTCUSDT': 3,
@@ -513,8 +1011,11 @@ ACCOUNT STATUS:
             'DOGEUSDT': 0,
             'BNBUSDT': 2
         }
-        precision = precisions.get(symbol, 3)
-        return round(quantity, precision)
+        return precisions.get(symbol, self.symbol_filters.get(symbol, {}).get('quantity', 3))
+
+    def _round_quantity(self, symbol: str, quantity: float) -> float:
+        """Redondea cantidad según las reglas del par"""
+        return round(quantity, self._quantity_decimals(symbol))
     
     def _round_price(self, symbol: str, price: float) -> float:
         """Redondea precio según las reglas del par"""
@@ -526,7 +1027,7 @@ ACCOUNT STATUS:
             'DOGEUSDT': 5,
             'BNBUSDT': 2
         }
-        precision = precisions.get(symbol, 2)
+        precision = precisions.get(symbol, self.symbol_filters.get(symbol, {}).get('price', 2))
         return round(price, precision)
     
     def _telegram_listener(self):
@@ -558,22 +1059,49 @@ ACCOUNT STATUS:
         if not text:
             return
 
-        # Comandos con /
-        if text.startswith("/"):
-            cmd = text.split()[0].lower()
-            if cmd == "/start":
-                self._send_telegram(chat_id, "🤖 *Alpha Arena Bot*\n\nComandos:\n/status - Ver posiciones y balance\n/history - Ver historial de trades\n/market - Ver datos de mercado\n\nO escribe cualquier pregunta sobre el mercado.")
-            elif cmd == "/status":
-                self._cmd_status(chat_id)
-            elif cmd == "/history":
-                self._cmd_history(chat_id)
-            elif cmd == "/market":
-                self._cmd_market(chat_id)
-            else:
-                self._send_telegram(chat_id, "Comando no reconocido. Usa /start para ver comandos.")
-        else:
+        handler, args = self._route_telegram(text)
+        handler(chat_id, *args)
+
+    def _route_telegram(self, text: str):
+        """Devuelve (handler, args) para un mensaje: comandos con / o chat natural"""
+        if not text.startswith("/"):
             # Chat natural con modelo gratis
-            self._cmd_chat(chat_id, text)
+            return self._cmd_chat, (text,)
+
+        commands = {
+            "/start": self._cmd_start,
+            "/status": self._cmd_status,
+            "/history": self._cmd_history,
+            "/market": self._cmd_market,
+            "/risk": self._cmd_risk
+        }
+        return commands.get(text.split()[0].lower(), self._cmd_unknown), ()
+
+    def _cmd_start(self, chat_id: int):
+        """Comando /start - lista de comandos"""
+        self._send_telegram(chat_id, TELEGRAM_HELP)
+
+    def _cmd_unknown(self, chat_id: int):
+        self._send_telegram(chat_id, "Comando no reconocido. Usa /start para ver comandos.")
+
+    def _status_message(self, account: dict) -> str:
+        msg = f"📊 *Estado de la Cuenta*\n\n"
+        msg += f"💰 Balance: ${account['balance']:,.2f}\n"
+        msg += f"📈 PnL No Realizado: ${account['unrealized_pnl']:,.2f}\n"
+        msg += f"💵 Equity: ${account['equity']:,.2f}\n"
+        msg += f"🏦 Disponible: ${account['available']:,.2f}\n"
+        msg += f"📍 Posiciones: {account['position_count']}/6\n\n"
+
+        if account['open_positions']:
+            msg += "*Posiciones Abiertas:*\n"
+            for pos in account['open_positions']:
+                emoji = "🟢" if pos['unrealized_pnl'] >= 0 else "🔴"
+                msg += f"{emoji} {pos['symbol']} {pos['side']}\n"
+                msg += f"   Size: {pos['size']} @ ${pos['entry_price']:,.2f}\n"
+                msg += f"   PnL: ${pos['unrealized_pnl']:,.2f}\n"
+        else:
+            msg += "_Sin posiciones abiertas_"
+        return msg
 
     def _cmd_status(self, chat_id: int):
         """Comando /status - muestra posiciones y balance"""
@@ -583,67 +1111,66 @@ ACCOUNT STATUS:
                 self._send_telegram(chat_id, "❌ Error obteniendo datos de cuenta")
                 return
 
-            msg = f"📊 *Estado de la Cuenta*\n\n"
-            msg += f"💰 Balance: ${account['balance']:,.2f}\n"
-            msg += f"📈 PnL No Realizado: ${account['unrealized_pnl']:,.2f}\n"
-            msg += f"💵 Equity: ${account['equity']:,.2f}\n"
-            msg += f"🏦 Disponible: ${account['available']:,.2f}\n"
-            msg += f"📍 Posiciones: {account['position_count']}/6\n\n"
-
-            if account['open_positions']:
-                msg += "*Posiciones Abiertas:*\n"
-                for pos in account['open_positions']:
-                    emoji = "🟢" if pos['unrealized_pnl'] >= 0 else "🔴"
-                    msg += f"{emoji} {pos['symbol']} {pos['side']}\n"
-                    msg += f"   Size: {pos['size']} @ ${pos['entry_price']:,.2f}\n"
-                    msg += f"   PnL: ${pos['unrealized_pnl']:,.2f}\n"
-            else:
-                msg += "_Sin posiciones abiertas_"
-
-            self._send_telegram(chat_id, msg)
+            self._send_telegram(chat_id, self._status_message(account))
         except Exception as e:
             self._send_telegram(chat_id, f"❌ Error: {e}")
 
-    def _cmd_history(self, chat_id: int):
-        """Comando /history - muestra historial de trades"""
+    def _history_message(self) -> str:
         if not self.trade_history:
-            self._send_telegram(chat_id, "📜 *Historial de Trades*\n\n_No hay trades registrados aún_")
-            return
+            return "📜 *Historial de Trades*\n\n_No hay trades registrados aún_"
 
         msg = "📜 *Historial de Trades*\n\n"
         for i, trade in enumerate(self.trade_history[-10:], 1):  # Últimos 10
             emoji = "🟢" if trade['action'] in ['OPEN_LONG', 'OPEN_SHORT'] else "🔴"
             msg += f"{emoji} *{trade['action']}* {trade['symbol']}\n"
             msg += f"   📅 {trade['timestamp']}\n"
+            if trade.get('execution'):
+                msg += f"   {describe_report(trade['execution'])}\n"
             msg += f"   💬 _{trade['reasoning']}_\n\n"
+        return msg
 
-        self._send_telegram(chat_id, msg)
+    def _cmd_history(self, chat_id: int):
+        """Comando /history - muestra historial de trades"""
+        self._send_telegram(chat_id, self._history_message())
+
+    def _market_message(self, market_data: dict) -> str:
+        msg = "📈 *Datos de Mercado*\n\n"
+        for pair, data in market_data.items():
+            if data:
+                trend_emoji = "🟢" if data['trend'] == 'BULLISH' else "🔴"
+                msg += f"*{pair}* {trend_emoji}\n"
+                msg += f"  💵 ${data['price']:,.2f}\n"
+                msg += f"  RSI: {data['rsi']} | {data['trend']}\n\n"
+        return msg
 
     def _cmd_market(self, chat_id: int):
         """Comando /market - muestra datos de mercado"""
         try:
-            market_data = self.get_market_data()
-            msg = "📈 *Datos de Mercado*\n\n"
-
-            for pair, data in market_data.items():
-                if data:
-                    trend_emoji = "🟢" if data['trend'] == 'BULLISH' else "🔴"
-                    msg += f"*{pair}* {trend_emoji}\n"
-                    msg += f"  💵 ${data['price']:,.2f}\n"
-                    msg += f"  RSI: {data['rsi']} | {data['trend']}\n\n"
-
-            self._send_telegram(chat_id, msg)
+            self._send_telegram(chat_id, self._market_message(self.get_market_data()))
         except Exception as e:
             self._send_telegram(chat_id, f"❌ Error: {e}")
 
-    def _cmd_chat(self, chat_id: int, question: str):
-        """Chat natural con modelo gratis"""
-        try:
-            # Obtener contexto actual
-            account = self.get_account_info()
-            market_data = self.get_market_data()
+    def _risk_message(self) -> str:
+        state = self.risk.state()
+        if state['equity'] is None:
+            return "🛡️ *Riesgo*\n\n_Sin datos de cuenta todavía_"
+
+        msg = "🛡️ *Riesgo Diario (UTC)*\n\n"
+        msg += f"📅 Día: {state['day']}\n"
+        msg += f"⚓ Equity inicio: ${state['day_start_equity']:,.2f}\n"
+        msg += f"💵 Equity actual: ${state['equity']:,.2f}\n"
+        msg += f"📉 Retorno diario: {state['daily_return']*100:.2f}% (límite -{state['loss_limit']*100:.0f}%)\n"
+        msg += f"📡 Último mark price: {state['last_mark_at'] or '-'}\n"
+        msg += "⏸️ *PAUSADO*" if state['tripped'] else "✅ Operando"
+        return msg
 
-            context = f"""Eres un asistente de trading crypto. Responde en español, breve y útil.
+    def _cmd_risk(self, chat_id: int):
+        """Comando /risk - muestra el estado del motor de riesgo"""
+        self._send_telegram(chat_id, self._risk_message())
+
+    def _chat_request(self, account: dict, market_data: dict, question: str) -> dict:
+        """Payload para el modelo gratis con el contexto actual de cuenta y mercado"""
+        context = f"""Eres un asistente de trading crypto. Responde en español, breve y útil.
 
 Datos actuales:
 - Balance: ${account['balance']:,.2f}
@@ -652,24 +1179,33 @@ Datos actuales:
 
 Mercado:
 """
-            for pair, data in market_data.items():
-                if data:
-                    context += f"- {pair}: ${data['price']:,.2f}, RSI={data['rsi']}, {data['trend']}\n"
+        for pair, data in market_data.items():
+            if data:
+                context += f"- {pair}: ${data['price']:,.2f}, RSI={data['rsi']}, {data['trend']}\n"
+
+        context += f"\nPregunta del usuario: {question}"
+
+        return {
+            "model": FREE_CHAT_MODEL,
+            "messages": [{"role": "user", "content": context}],
+            "max_tokens": 500
+        }
 
-            context += f"\nPregunta del usuario: {question}"
+    def _cmd_chat(self, chat_id: int, question: str):
+        """Chat natural con modelo gratis"""
+        try:
+            # Obtener contexto actual
+            account = self.get_account_info()
+            market_data = self.get_market_data()
 
             # Llamar modelo gratis
             response = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
+                OPENROUTER_URL,
                 headers={
                     "Authorization": f"Bearer {OPENROUTER_API_KEY}",
                     "Content-Type": "application/json"
                 },
-                json={
-                    "model": FREE_CHAT_MODEL,
-                    "messages": [{"role": "user", "content": context}],
-                    "max_tokens": 500
-                },
+                json=self._chat_request(account, market_data, question),
                 timeout=30
             )
 
@@ -686,11 +1222,13 @@ Mercado:
         """Envía mensaje a un chat específico"""
         try:
             url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-            requests.post(url, json={
+            response = requests.post(url, json={
                 "chat_id": chat_id,
                 "text": message,
                 "parse_mode": "Markdown"
             })
+            if response.status_code != 200:
+                logger.warning(f"⚠️ Telegram rechazó el mensaje: {response.status_code} - {response.text[:200]}")
         except Exception as e:
             logger.warning(f"⚠️ Error enviando Telegram: {e}")
 
@@ -699,27 +1237,16 @@ Mercado:
         if TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID:
             try:
                 url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-                requests.post(url, json={
+                response = requests.post(url, json={
                     "chat_id": TELEGRAM_CHAT_ID,
                     "text": f"🤖 Alpha Arena Bot\n\n{message}",
                     "parse_mode": "Markdown"
                 })
+                if response.status_code != 200:
+                    logger.warning(f"⚠️ Telegram rechazó el mensaje: {response.status_code} - {response.text[:200]}")
             except Exception as e:
                 logger.warning(f"⚠️ Error enviando Telegram: {e}")
     
-    def check_daily_loss(self) -> bool:
-        """Verifica si se excedió el límite de pérdida diaria"""
-        account = self.get_account_info()
-        if account:
-            current_equity = account['equity']
-            daily_return = (current_equity - self.starting_balance) / self.starting_balance
-            
-            if daily_return <= -DAILY_LOSS_LIMIT:
-                logger.warning(f"⚠️ Daily loss limit reached: {daily_return*100:.2f}%")
-                self._notify(f"⚠️ PAUSA - Límite diario alcanzado: {daily_return*100:.2f}%")
-                return True
-        return False
-    
     def run(self):
         """Loop principal del bot"""
         logger.info("🚀 Iniciando loop de trading...")
@@ -727,36 +1254,75 @@ Mercado:
         
         while True:
             try:
-                # Verificar límite diario
-                if self.check_daily_loss():
-                    logger.info("⏸️ Trading pausado por límite diario. Esperando reset...")
-                    time.sleep(3600)  # Esperar 1 hora
-                    continue
+                # Verificar límite diario (el motor de riesgo también vigila entre ciclos)
+                account_info = self.get_account_info()
+                if account_info:
+                    self.risk.sync_account(account_info)
+                # En pausa el ciclo sigue (invalidaciones, cierres de la IA); _skip_trade bloquea las entradas
+                self.is_paused = self.risk.is_paused()
+                if self.is_paused:
+                    logger.info("⏸️ Límite diario alcanzado: solo cierres hasta el próximo día UTC")
                 
                 # Obtener datos
                 logger.info("📊 Obteniendo datos de mercado...")
-                market_data = self.get_market_data()
-                account_info = self.get_account_info()
+                universe = {}
+                if SCREENER_ENABLED:
+                    try:
+                        universe = self.screen_universe()
+                    except Exception as e:
+                        logger.warning(f"⚠️ Error en screener, usando TRADING_PAIRS: {e}")
+                pairs = (list(universe) + [s for s in self.positions if s not in universe]) if universe else TRADING_PAIRS
+                market_data = self.get_market_data(pairs)
                 
                 if not market_data or not account_info:
                     logger.warning("⚠️ No se pudieron obtener datos, reintentando...")
                     time.sleep(30)
                     continue
+
+                self._sync_positions(account_info)
+                self.candle_times = {pair: data['candle_time'] for pair, data in market_data.items() if data}
+
+                # Invalidaciones locales: cierre inmediato sin esperar a la IA
+                open_before = set(self.positions)
+                with self.trade_lock:
+                    self.check_invalidations(market_data)
+                if set(self.positions) != open_before:
+                    account_info = self.get_account_info() or account_info
+                    self.risk.sync_account(account_info)
                 
                 # Construir prompt y consultar IA
                 logger.info("🧠 Consultando DeepSeek...")
-                prompt = self.build_prompt(market_data, account_info)
+                prompt_data = self.select_prompt_pairs(market_data, universe) if universe else market_data
+                if MARKET_FEATURES:
+                    self.add_open_interest(prompt_data)
+                prompt = self.build_prompt(prompt_data, account_info)
                 decision = self.query_deepseek(prompt)
+                self._review_decision(prompt, decision, prompt_data, account_info)
+
+                if not self.first_decision_logged:
+                    self.first_decision_logged = True
+                    logger.info(f"⏱️ Primera decisión a los {time.time() - PROCESS_START:.2f}s del arranque")
                 
                 if decision:
                     # Ejecutar decisión
-                    if isinstance(decision, list):
-                        for d in decision:
-                            self.execute_trade(d)
-                    else:
-                        self.execute_trade(decision)
+                    open_before = set(self.positions)
+                    with self.trade_lock:
+                        if isinstance(decision, list):
+                            for d in decision:
+                                self.execute_trade(d)
+                        else:
+                            self.execute_trade(decision)
+
+                    # Posiciones nuevas/cerradas: el motor de riesgo debe verlas ya
+                    if set(self.positions) != open_before:
+                        refreshed = self.get_account_info()
+                        if refreshed:
+                            self.risk.sync_account(refreshed)
                 else:
                     logger.warning("⚠️ No se obtuvo decisión válida de DeepSeek")
+
+                # Checkpoint para poder reanudar tras un redeploy o crash
+                self._checkpoint()
                 
                 # Log estado
                 logger.info(f"💰 Balance: ${account_info['balance']:,.2f} | PnL: ${account_info['unrealized_pnl']:,.2f}")
@@ -767,6 +1333,9 @@ Mercado:
             except KeyboardInterrupt:
                 logger.info("🛑 Bot detenido por usuario")
                 self._notify("🛑 Bot detenido")
+                self._checkpoint()
+                if self.indicator_pool:
+                    self.indicator_pool.shutdown()
                 break
             except Exception as e:
                 logger.error(f"❌ Error en loop principal: {e}")
@@ -774,5 +1343,10 @@ Mercado:
 
 
 if __name__ == "__main__":
-    bot = TradingBot()
-    bot.run()
+    if ASYNC_CORE:
+        import asyncio
+        from async_bot import AsyncTradingBot
+        asyncio.run(AsyncTradingBot().run())
+    else:
+        bot = TradingBot()
+        bot.run()
@@ -3,6 +3,10 @@ Prompts para Alpha Arena Trading Bot
 Basados en ingeniería inversa real de nof1.ai Alpha Arena
 """
 
+# Universo operable: lista fija o los candidatos del screener (SCREENER_ENABLED)
+FIXED_UNIVERSE_RULE = "Trade only: BTC, ETH, SOL, XRP, DOGE, BNB perpetuals (USDT pairs)"
+SCREENED_UNIVERSE_RULE = "Trade only the screened candidates listed in the market data (USDT perpetuals)"
+
 # ============== MODO BASELINE (Standard) ==============
 BASELINE_SYSTEM_PROMPT = """You are an autonomous crypto trading agent on Binance Futures. Capital: $10,000.
 
@@ -112,6 +116,7 @@ MODE_CONFIGS = {
         "cash_buffer": 0.30,
         "max_positions": 6,
         "min_confidence": 0.6,
+        "screener_top_k": 6,  # Pares que el screener envía a la IA
         "description": "Modo estándar Alpha Arena"
     },
     "monk_mode": {
@@ -121,6 +126,7 @@ MODE_CONFIGS = {
         "cash_buffer": 0.30,  # Igual que baseline
         "max_positions": 6,  # Igual que baseline
         "min_confidence": 0.70,  # Solo esto cambia: >0.7 por el prompt
+        "screener_top_k": 4,  # Prompt corto: menos candidatos
         "description": "Monk Mode - Prompt corto, hold como óptimo"
     },
     "max_leverage": {
@@ -130,6 +136,7 @@ MODE_CONFIGS = {
         "cash_buffer": 0.20,
         "max_positions": 4,
         "min_confidence": 0.65,
+        "screener_top_k": 4,
         "description": "Agresivo - Solo expertos"
     }
 }
@@ -140,7 +147,8 @@ def get_mode_config(mode: str = "baseline") -> dict:
     return MODE_CONFIGS.get(mode, MODE_CONFIGS["baseline"])
 
 
-def get_system_prompt(mode: str = "baseline") -> str:
-    """Obtiene el system prompt para un modo específico"""
+def get_system_prompt(mode: str = "baseline", screener: bool = False) -> str:
+    """Obtiene el system prompt para un modo específico (con el screener, sin lista fija de monedas)"""
     config = get_mode_config(mode)
-    return config["prompt"]
+    universe = SCREENED_UNIVERSE_RULE if screener else FIXED_UNIVERSE_RULE
+    return config["prompt"].replace(FIXED_UNIVERSE_RULE, universe)
@@ -0,0 +1,68 @@
+"""
+Grabación de decisiones para replay
+Cada ciclo guarda (prompt, respuesta cruda de la IA, decisión parseada, snapshot de
+mercado/cuenta) como una línea JSON en un archivo gzip. Se abre en modo append por
+registro: cada línea es un miembro gzip independiente y un corte a mitad de escritura
+solo pierde el último registro.
+"""
+
+import json
+import gzip
+import zlib
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Iterator
+
+logger = logging.getLogger(__name__)
+
+RECORD_VERSION = 1
+
+
+def snapshot_id(market_data: dict, account_info: dict, positions: dict) -> str:
+    """Identificador del estado que vio la IA: mismo snapshot -> mismo id en distintas grabaciones"""
+    body = json.dumps([market_data, account_info, positions], sort_keys=True, default=str)
+    return hashlib.sha256(body.encode()).hexdigest()[:16]
+
+
+class DecisionRecorder:
+    """Añade registros a un archivo .jsonl.gz"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def record(self, prompt: str, response: str, decision, market_data: dict, account_info: dict,
+               positions: dict, **meta):
+        entry = {
+            'v': RECORD_VERSION,
+            'ts': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'snapshot_id': snapshot_id(market_data, account_info, positions),
+            **meta,
+            'prompt': prompt,
+            'response': response,
+            'decision': decision,
+            'market_data': market_data,
+            'account': account_info,
+            'positions': positions,
+        }
+        try:
+            with gzip.open(self.path, 'at', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':'), default=str) + '\n')
+        except OSError as e:
+            logger.warning(f"⚠️ Error grabando decisión ({self.path}): {e}")
+
+
+def read_records(path: str) -> Iterator[dict]:
+    """Lee los registros en orden; ignora un último registro truncado y versiones desconocidas"""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        try:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if entry.get('v') == RECORD_VERSION:
+                    yield entry
+        except (EOFError, zlib.error, gzip.BadGzipFile) as e:
+            logger.warning(f"⚠️ Grabación truncada ({path}): {e}")
+
@@ -0,0 +1,225 @@
+"""
+Replay de decisiones grabadas (RECORD_FILE)
+Re-ejecuta parseo, validación y ejecución simulada sobre grabaciones .jsonl.gz sin
+tocar Binance, y compara decisiones entre dos grabaciones (p.ej. dos versiones del prompt).
+
+    python replay.py stats decisions.jsonl.gz
+    python replay.py requery decisions.jsonl.gz nuevo.jsonl.gz   # prompts con el código actual + DeepSeek
+    python replay.py requery decisions.jsonl.gz --dry-run        # solo cuenta los prompts que cambian
+    python replay.py diff decisions.jsonl.gz nuevo.jsonl.gz
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+from collections import Counter
+from typing import Dict, List, Optional
+
+os.environ.setdefault("LOG_FILE", "replay.log")  # Los logs del bot no van a trading_bot.log
+
+import main
+from main import TradingBot, TRADING_MODE, DEEPSEEK_MODEL, MAX_LEVERAGE
+from decisions import ENTRY_SIGNALS, SIGNALS, as_list, parse_decision, validate_decision
+from recorder import DecisionRecorder, read_records
+
+
+def replay_bot() -> TradingBot:
+    """TradingBot sin conexión a Binance ni pool de procesos (solo la lógica pura)"""
+    main.USE_PROCESS_POOL = False
+    bot = TradingBot.__new__(TradingBot)
+    bot._init_state()
+    bot.recorder = None
+    return bot
+
+
+def reparse(record: dict):
+    """Parsea de nuevo la respuesta cruda con el parser actual; None si falla"""
+    if not record.get('response'):
+        return None
+    try:
+        return parse_decision(record['response'])
+    except ValueError:
+        return None
+
+
+def simulate(bot: TradingBot, record: dict, decision) -> List[dict]:
+    """Lo que execute_trade haría con la decisión, sin enviar órdenes"""
+    account = record['account']
+    bot.positions = dict(record.get('positions') or {})
+    open_symbols = {pos['symbol'] for pos in account['open_positions']}
+    results = []
+
+    for d in as_list(decision):
+        if not isinstance(d, dict) or d.get('signal') not in SIGNALS:
+            results.append({'outcome': 'invalid'})
+            continue
+        try:
+            trade = bot._parse_trade(d)
+            symbol = trade['symbol']
+            if bot._skip_trade(trade):
+                results.append({'symbol': symbol, 'outcome': 'skip' if trade['signal'] != 'hold' else 'hold'})
+            elif trade['signal'] in ENTRY_SIGNALS:
+                data = record['market_data'].get(symbol)
+                if not data:
+                    results.append({'symbol': symbol, 'outcome': 'no_market_data'})
+                    continue
+                quantity = bot._entry_quantity(trade, account['available'], data['price'])
+                results.append({
+                    'symbol': symbol,
+                    'outcome': 'open' if quantity > 0 else 'zero_quantity',
+                    'side': 'LONG' if trade['signal'] == 'buy_to_enter' else 'SHORT',
+                    'quantity': quantity,
+                    'notional': round(quantity * data['price'], 2),
+                    'leverage': min(trade['leverage'], MAX_LEVERAGE)
+                })
+            else:
+                results.append({'symbol': symbol, 'outcome': 'close' if symbol in open_symbols else 'no_position'})
+        except Exception as e:
+            results.append({'outcome': 'error', 'error': repr(e)})
+    return results
+
+
+def _error_kind(error: str) -> str:
+    """'TP/SL del lado equivocado del precio (BTCUSDT...)' -> 'TP/SL del lado equivocado del precio'"""
+    return error.split(' (')[0].split(':')[0]
+
+
+def _pct(count: int, total: int) -> str:
+    return f"{count / total * 100:.2f}%" if total else "0.00%"
+
+
+def cmd_stats(args):
+    bot = replay_bot()
+    for path in args.recordings:
+        start = time.time()
+        total = no_response = parse_failures = parser_changes = decisions = invalid = 0
+        error_kinds, signals, outcomes = Counter(), Counter(), Counter()
+
+        for record in read_records(path):
+            total += 1
+            if not record.get('response'):
+                no_response += 1  # Error HTTP/timeout: no cuenta como fallo de parseo
+                continue
+            decision = reparse(record)
+            if decision is None:
+                parse_failures += 1
+                continue
+            if decision != record.get('decision'):
+                parser_changes += 1
+
+            for d in as_list(decision):
+                decisions += 1
+                signals[d.get('signal') if isinstance(d, dict) else '?'] += 1
+                errors = validate_decision(d, record['market_data'])
+                if errors:
+                    invalid += 1
+                    error_kinds.update(_error_kind(e) for e in errors)
+            outcomes.update(r['outcome'] for r in simulate(bot, record, decision))
+
+        print(f"\n📼 {path}: {total} registros en {time.time() - start:.2f}s")
+        print(f"Sin respuesta de la IA: {no_response}")
+        answered = total - no_response
+        print(f"Parseo: {parse_failures} fallos ({_pct(parse_failures, answered)}) | "
+              f"{parser_changes} distintos de la decisión grabada")
+        print(f"Validación: {invalid}/{decisions} decisiones con problemas ({_pct(invalid, decisions)})")
+        for kind, count in error_kinds.most_common():
+            print(f"  - {kind}: {count}")
+        print("Señales: " + " | ".join(f"{signal} {count}" for signal, count in signals.most_common()))
+        print("Ejecución simulada: " + " | ".join(f"{outcome} {count}" for outcome, count in outcomes.most_common()))
+
+
+def _signals_by_coin(decision) -> Dict[str, str]:
+    """{coin: signal}; una respuesta sin parsear cuenta como PARSE_ERROR"""
+    if decision is None:
+        return {'*': 'PARSE_ERROR'}
+    signals = {}
+    for d in as_list(decision):
+        if isinstance(d, dict):
+            signals[str(d.get('coin') or '*').upper()] = d.get('signal', '?')
+    return signals or {'*': 'EMPTY'}
+
+
+def cmd_diff(args):
+    baseline = {r['snapshot_id']: r for r in read_records(args.baseline)}
+    candidate = {r['snapshot_id']: r for r in read_records(args.candidate)}
+    common = [sid for sid in baseline if sid in candidate]
+    print(f"\n🔀 {args.baseline} ({len(baseline)}) vs {args.candidate} ({len(candidate)}): {len(common)} snapshots en común")
+    if not common:
+        return
+
+    changes, examples = Counter(), []
+    identical = 0
+    for sid in common:
+        old, new = _signals_by_coin(reparse(baseline[sid])), _signals_by_coin(reparse(candidate[sid]))
+        if old == new:
+            identical += 1
+            continue
+        for coin in sorted(set(old) | set(new)):
+            transition = (old.get(coin, '-'), new.get(coin, '-'))
+            if transition[0] != transition[1]:
+                changes[transition] += 1
+                examples.append((baseline[sid]['ts'], coin, *transition))
+
+    for label, records in (('base', baseline), ('nuevo', candidate)):
+        failures = sum(1 for sid in common if reparse(records[sid]) is None)
+        print(f"Fallos de parseo ({label}): {failures} ({_pct(failures, len(common))})")
+    print(f"Decisiones idénticas: {identical}/{len(common)} ({_pct(identical, len(common))})")
+    for (old, new), count in changes.most_common():
+        print(f"  {old} → {new}: {count}")
+    for ts, coin, old, new in examples[:args.limit]:
+        print(f"    {ts} {coin}: {old} → {new}")
+
+
+def cmd_requery(args):
+    if not args.dry_run and not args.output:
+        sys.exit("requery necesita un archivo de salida (o --dry-run)")
+    bot = replay_bot()
+    recorder = None if args.dry_run else DecisionRecorder(args.output)
+    total = changed = 0
+
+    for record in read_records(args.recording):
+        total += 1
+        bot.positions = dict(record.get('positions') or {})
+        prompt = bot.build_prompt(record['market_data'], record['account'])
+        changed += prompt != record['prompt']
+        if recorder:
+            decision = bot.query_deepseek(prompt)
+            recorder.record(
+                prompt, bot.last_llm_response, decision, record['market_data'], record['account'],
+                record.get('positions') or {}, mode=TRADING_MODE, model=DEEPSEEK_MODEL
+            )
+
+    print(f"\n🔁 {total} snapshots: {changed} prompts distintos con el código actual ({_pct(changed, total)})")
+    if recorder:
+        print(f"Grabación nueva: {args.output} (compárala con: python replay.py diff {args.recording} {args.output})")
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Replay de decisiones grabadas del bot")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    stats = commands.add_parser('stats', help='parseo, validación y ejecución simulada')
+    stats.add_argument('recordings', nargs='+')
+    stats.set_defaults(func=cmd_stats)
+
+    diff = commands.add_parser('diff', help='cambios de decisión entre dos grabaciones (mismos snapshots)')
+    diff.add_argument('baseline')
+    diff.add_argument('candidate')
+    diff.add_argument('--limit', type=int, default=20, help='ejemplos a mostrar')
+    diff.set_defaults(func=cmd_diff)
+
+    requery = commands.add_parser('requery', help='rehace los prompts con el código actual y consulta DeepSeek')
+    requery.add_argument('recording')
+    requery.add_argument('output', nargs='?')
+    requery.add_argument('--dry-run', action='store_true', help='no consulta la IA; solo compara prompts')
+    requery.set_defaults(func=cmd_requery)
+
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    logging.getLogger().setLevel(logging.WARNING)  # El replay imprime su propio reporte
+    args.func(args)
@@ -0,0 +1,139 @@
+"""
+Motor de riesgo: ventana diaria UTC con mark-to-market continuo
+La equity se recalcula con cada mark price recibido, sin esperar al loop principal.
+"""
+
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RiskEngine:
+    """Mantiene el ancla de equity del día UTC y dispara on_breach al superar el límite"""
+
+    def __init__(self, loss_limit: float, on_breach: Callable[[dict], None]):
+        self.loss_limit = loss_limit
+        self.on_breach = on_breach
+        self.lock = threading.Lock()
+
+        self.day: Optional[str] = None  # Día UTC del ancla (YYYY-MM-DD)
+        self.day_start_equity: Optional[float] = None
+        self.tripped = False
+        self.tripped_at: Optional[str] = None
+
+        self.wallet_balance: Optional[float] = None
+        self.positions: Dict[str, Tuple[float, float]] = {}  # symbol -> (cantidad con signo, entry)
+        self.marks: Dict[str, float] = {}
+        self.last_mark_at: Optional[str] = None
+
+    def sync_account(self, account_info: dict):
+        """Resincroniza balance y posiciones con la cuenta (cada ciclo y cada RISK_ACCOUNT_SYNC)
+
+        Las posiciones que el exchange ya no tiene dejan de valorarse: no se extrapolan.
+        """
+        with self.lock:
+            self.wallet_balance = account_info['balance']
+            self.positions = {
+                pos['symbol']: (pos['size'] if pos['side'] == 'LONG' else -pos['size'], pos['entry_price'])
+                for pos in account_info['open_positions']
+            }
+            # El PnL no realizado de la cuenta ya está valorado a mark price
+            for pos in account_info['open_positions']:
+                amt, entry = self.positions[pos['symbol']]
+                self.marks[pos['symbol']] = entry + pos['unrealized_pnl'] / amt
+        self.evaluate()
+
+    def on_mark_price(self, symbol: str, price: float):
+        """Actualiza el mark price de un símbolo y reevalúa si hay posición abierta"""
+        with self.lock:
+            self.marks[symbol] = price
+            self.last_mark_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+            if symbol not in self.positions:
+                return
+        self.evaluate()
+
+    def _equity(self) -> Optional[float]:
+        if self.wallet_balance is None:
+            return None
+        unrealized = sum(
+            amt * (self.marks.get(symbol, entry) - entry)
+            for symbol, (amt, entry) in self.positions.items()
+        )
+        return self.wallet_balance + unrealized
+
+    def evaluate(self, now: Optional[datetime] = None):
+        """Rueda el ancla al cambiar el día UTC y comprueba el drawdown diario"""
+        now = now or datetime.now(timezone.utc)
+        today = now.strftime("%Y-%m-%d")
+        breach = None
+
+        with self.lock:
+            equity = self._equity()
+            if equity is None:
+                return
+
+            if today != self.day:
+                if self.day is not None:
+                    logger.info(f"🌅 Nuevo día UTC {today}: ancla de equity ${equity:,.2f}")
+                self.day = today
+                self.day_start_equity = equity
+                self.tripped = False
+                self.tripped_at = None
+
+            daily_return = (equity - self.day_start_equity) / self.day_start_equity
+            if daily_return <= -self.loss_limit and not self.tripped:
+                self.tripped = True
+                self.tripped_at = now.isoformat(timespec='seconds')
+                breach = self._state(equity)
+
+        # Fuera del lock: la acción puede enviar órdenes y tardar
+        if breach:
+            logger.warning(f"⚠️ Daily loss limit reached: {breach['daily_return']*100:.2f}%")
+            self.on_breach(breach)
+
+    def is_paused(self) -> bool:
+        """True si el límite diario se alcanzó hoy (se libera al cambiar el día UTC)"""
+        self.evaluate()
+        return self.tripped
+
+    def _state(self, equity: Optional[float]) -> dict:
+        daily_return = None
+        if equity is not None and self.day_start_equity:
+            daily_return = (equity - self.day_start_equity) / self.day_start_equity
+        return {
+            'day': self.day,
+            'day_start_equity': self.day_start_equity,
+            'equity': equity,
+            'daily_return': daily_return,
+            'loss_limit': self.loss_limit,
+            'tripped': self.tripped,
+            'tripped_at': self.tripped_at,
+            'open_positions': len(self.positions),
+            'last_mark_at': self.last_mark_at
+        }
+
+    def state(self) -> dict:
+        """Estado actual del motor de riesgo (para Telegram y logs)"""
+        with self.lock:
+            return self._state(self._equity())
+
+    def snapshot(self) -> dict:
+        """Datos mínimos para el checkpoint"""
+        with self.lock:
+            return {
+                'day': self.day,
+                'day_start_equity': self.day_start_equity,
+                'tripped': self.tripped,
+                'tripped_at': self.tripped_at
+            }
+
+    def restore(self, snapshot: dict):
+        """Restaura el ancla diaria desde un checkpoint (warm start)"""
+        with self.lock:
+            self.day = snapshot.get('day')
+            self.day_start_equity = snapshot.get('day_start_equity')
+            self.tripped = snapshot.get('tripped', False)
+            self.tripped_at = snapshot.get('tripped_at')
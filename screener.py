@@ -0,0 +1,70 @@
+"""
+Screener de candidatos previo a la IA
+1) Universo: todos los perpetuos USDT rankeados por volumen y volatilidad (ticker 24h bulk)
+2) Candidatos: score local con indicadores; solo los top-K (+ posiciones abiertas) van al prompt
+"""
+
+from typing import Dict, Iterable, List
+
+# Indicadores "planos": RSI cerca de 50 y EMAs prácticamente juntas
+FLAT_RSI_BAND = 5  # |RSI - 50| menor que esto
+FLAT_EMA_SPREAD = 0.001  # |EMA20 - EMA50| / precio menor que esto (0.1%)
+
+
+def _percentile_ranks(values: Dict[str, float]) -> Dict[str, float]:
+    """Rank percentil (0..1) de cada valor; 1 = el mayor"""
+    if len(values) <= 1:
+        return {key: 1.0 for key in values}
+    order = sorted(values, key=values.get)
+    return {key: position / (len(order) - 1) for position, key in enumerate(order)}
+
+
+def rank_universe(tickers: List[dict], tradable: Iterable[str], size: int) -> Dict[str, dict]:
+    """Selecciona los `size` símbolos más líquidos y volátiles a partir del ticker 24h de todos los pares"""
+    tradable = set(tradable)
+    stats = {}
+    for ticker in tickers:
+        symbol = ticker['symbol']
+        last_price = float(ticker['lastPrice'])
+        if symbol not in tradable or last_price <= 0:
+            continue
+        stats[symbol] = {
+            'quote_volume': float(ticker['quoteVolume']),
+            'range_pct': (float(ticker['highPrice']) - float(ticker['lowPrice'])) / last_price * 100
+        }
+
+    volume_rank = _percentile_ranks({s: v['quote_volume'] for s, v in stats.items()})
+    range_rank = _percentile_ranks({s: v['range_pct'] for s, v in stats.items()})
+    ranked = sorted(stats, key=lambda s: volume_rank[s] + range_rank[s], reverse=True)
+    return {symbol: stats[symbol] for symbol in ranked[:size]}
+
+
+def is_flat(data: dict) -> bool:
+    """True si el par no muestra ninguna señal: RSI neutral y EMAs sin separación"""
+    ema_spread = abs(data['ema_20'] - data['ema_50']) / data['price']
+    return abs(data['rsi'] - 50) < FLAT_RSI_BAND and ema_spread < FLAT_EMA_SPREAD
+
+
+def score_candidates(market_data: Dict[str, dict], stats: Dict[str, dict]) -> Dict[str, float]:
+    """Score 0..1 por par: media de ranks de RSI extremo, momentum MACD, tendencia EMA, volatilidad y volumen"""
+    pairs = {pair: data for pair, data in market_data.items() if data}
+    features = {
+        'rsi': {p: abs(d['rsi'] - 50) for p, d in pairs.items()},
+        'macd': {p: abs(d['macd'] - d['macd_signal']) / d['price'] for p, d in pairs.items()},
+        'ema': {p: abs(d['ema_20'] - d['ema_50']) / d['price'] for p, d in pairs.items()},
+        'range': {p: stats.get(p, {}).get('range_pct', 0.0) for p in pairs},
+        'volume': {p: stats.get(p, {}).get('quote_volume', 0.0) for p in pairs},
+    }
+    ranks = [_percentile_ranks(values) for values in features.values()]
+    return {pair: sum(rank[pair] for rank in ranks) / len(ranks) for pair in pairs}
+
+
+def select_candidates(market_data: Dict[str, dict], scores: Dict[str, float],
+                      open_symbols: Iterable[str], top_k: int) -> Dict[str, dict]:
+    """Posiciones abiertas siempre + los top_k pares no planos con mejor score"""
+    open_symbols = [s for s in open_symbols if market_data.get(s)]
+    ranked = sorted(
+        (pair for pair in scores if pair not in open_symbols and not is_flat(market_data[pair])),
+        key=scores.get, reverse=True
+    )
+    return {pair: market_data[pair] for pair in open_symbols + ranked[:top_k]}
@@ -0,0 +1,46 @@
+"""
+Checkpoint del estado del bot para reinicios en caliente (warm start)
+La escritura es atómica: archivo temporal + fsync + os.replace
+"""
+
+import os
+import json
+import logging
+import tempfile
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+STATE_VERSION = 1
+
+
+def save_state(path: str, state: dict):
+    """Escribe el checkpoint de forma atómica (nunca deja un archivo a medias)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.state-', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'version': STATE_VERSION, **state}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_state(path: str) -> Optional[dict]:
+    """Lee el checkpoint; devuelve None si no existe o no es válido"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Checkpoint ilegible ({path}): {e}")
+        return None
+    if state.get('version') != STATE_VERSION:
+        logger.warning(f"⚠️ Versión de checkpoint incompatible: {state.get('version')}")
+        return None
+    return state
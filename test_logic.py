@@ -0,0 +1,147 @@
+"""
+Tests de la lógica pura: invalidaciones, troceo de órdenes, screener y motor de riesgo
+    python -m pytest -q
+"""
+
+import pytest
+
+from execution import child_quantities
+from invalidation import InvalidationCache, compile_condition
+from risk import RiskEngine
+from screener import is_flat, score_candidates, select_candidates
+
+# Estado de la última vela cerrada y de la anterior (ver 'closed'/'prev_closed' en compute_indicators)
+CLOSED = {'close': 99.0, 'rsi': 75.0, 'macd': -1.0, 'macd_signal': 0.0, 'ema_20': 101.0, 'ema_50': 98.0}
+PREV = {**CLOSED, 'macd': 1.0, 'rsi': 65.0}
+
+
+def evaluate(text, state=CLOSED, prev=PREV, symbol='ETHUSDT'):
+    predicate = compile_condition(text, symbol)
+    return None if predicate is None else predicate(state, prev)
+
+
+# ============== INVALIDACIÓN ==============
+
+@pytest.mark.parametrize('text, expected', [
+    ("Price closes below EMA50", False),
+    ("Price closes below EMA 20", True),
+    ("Price closes above the EMA50.", True),
+    ("RSI above 70", True),
+    ("Price below $99,500.5", True),
+    ("close below 98", False),
+])
+def test_simple_clauses(text, expected):
+    assert evaluate(text) is expected
+
+
+def test_cross_requires_previous_candle_on_the_other_side():
+    assert evaluate("MACD crosses below signal") is True
+    assert evaluate("MACD crosses below signal", prev=CLOSED) is False
+    assert evaluate("RSI crosses above 70") is True
+    assert evaluate("RSI crosses above 70", prev={**PREV, 'rsi': 72.0}) is False
+
+
+def test_and_binds_tighter_than_or():
+    assert evaluate("RSI > 80 or price < 101") is True
+    assert evaluate("RSI > 80 and price < 101") is False
+    # (RSI > 80 and price < 101) or MACD < signal
+    assert evaluate("RSI > 80 and price < 101 or MACD below signal") is True
+
+
+@pytest.mark.parametrize('text', [
+    "none", "N/A", "", "Price breaks below support", "4h candle closes below EMA50",
+])
+def test_empty_or_unparseable_is_left_to_the_llm(text):
+    assert evaluate(text) is None
+
+
+def test_foreign_coin_is_rejected():
+    assert evaluate("BTC breaks below 60000", symbol='SOLUSDT') is None
+    assert evaluate("sol below 100 and eth above 5", symbol='SOLUSDT') is None
+    assert evaluate("BTC breaks below 60000", state={**CLOSED, 'close': 59000.0}, symbol='BTCUSDT') is True
+
+
+def test_cache_is_keyed_by_symbol():
+    cache = InvalidationCache()
+    assert cache.get("BTC below 5", 'SOLUSDT') is None
+    assert cache.get("BTC below 5", 'BTCUSDT') is not None
+    assert cache.is_empty(" None. ") and not cache.is_empty("RSI above 70")
+
+
+# ============== TROCEO DE ÓRDENES ==============
+
+def test_slicing_never_oversends_nor_exceeds_the_cap():
+    children = child_quantities(0.011, 60000, 100, 3)
+    assert children == [0.001] * 11
+    assert round(sum(children), 3) == 0.011
+
+
+@pytest.mark.parametrize('quantity, price, max_notional, decimals', [
+    (1.0, 100, 30, 1),
+    (0.537, 25000, 1000, 3),
+    (1234, 0.5, 100, 0),
+])
+def test_slices_sum_exactly_and_respect_max_notional(quantity, price, max_notional, decimals):
+    children = child_quantities(quantity, price, max_notional, decimals)
+    assert round(sum(children), decimals) == quantity
+    assert all(child * price <= max_notional + 1e-9 for child in children)
+
+
+def test_no_slicing_when_disabled_or_one_step_exceeds_the_cap():
+    assert child_quantities(0.5, 100, 0, 3) == [0.5]
+    assert child_quantities(0.002, 60000, 50, 3) == [0.002]
+
+
+# ============== SCREENER ==============
+
+def market(rsi, macd, ema_20, ema_50, price=100.0):
+    return {'price': price, 'rsi': rsi, 'macd': macd, 'macd_signal': 0.0, 'ema_20': ema_20, 'ema_50': ema_50}
+
+
+def test_flat_pairs_are_not_selected_but_open_positions_always_are():
+    market_data = {
+        'AUSDT': market(80, 2.0, 105, 95),
+        'BUSDT': market(50, 0.0, 100, 100),  # plano
+        'CUSDT': market(30, -1.0, 97, 101),
+        'DUSDT': None,
+    }
+    assert is_flat(market_data['BUSDT']) and not is_flat(market_data['AUSDT'])
+    stats = {'AUSDT': {'range_pct': 6.0, 'quote_volume': 3e9}, 'BUSDT': {'range_pct': 1.0, 'quote_volume': 1e9},
+             'CUSDT': {'range_pct': 3.0, 'quote_volume': 2e9}}
+    scores = score_candidates(market_data, stats)
+    assert set(scores) == {'AUSDT', 'BUSDT', 'CUSDT'}
+    selected = select_candidates(market_data, scores, ['BUSDT', 'DUSDT'], top_k=1)
+    assert list(selected) == ['BUSDT', 'AUSDT']
+
+
+# ============== MOTOR DE RIESGO ==============
+
+def account(balance, positions=()):
+    return {
+        'balance': balance,
+        'open_positions': [
+            {'symbol': symbol, 'side': 'LONG', 'size': size, 'entry_price': entry, 'unrealized_pnl': 0.0}
+            for symbol, size, entry in positions
+        ],
+    }
+
+
+def test_breach_fires_once_per_day():
+    breaches = []
+    engine = RiskEngine(0.05, breaches.append)
+    engine.sync_account(account(1000, [('BTCUSDT', 1.0, 100.0)]))
+    engine.on_mark_price('BTCUSDT', 40.0)  # -60 = -6%
+    engine.on_mark_price('BTCUSDT', 30.0)
+    assert len(breaches) == 1 and engine.is_paused()
+    assert breaches[0]['daily_return'] == pytest.approx(-0.06)
+
+
+def test_positions_closed_on_the_exchange_are_not_extrapolated():
+    breaches = []
+    engine = RiskEngine(0.05, breaches.append)
+    engine.sync_account(account(1000, [('BTCUSDT', 1.0, 100.0)]))
+    # SL ejecutado en el exchange: la resincronización trae el balance real y ninguna posición
+    engine.sync_account(account(990))
+    engine.on_mark_price('BTCUSDT', 0.0)
+    assert engine.positions == {} and not breaches
+    assert engine.state()['equity'] == 990
@@ -0,0 +1,132 @@
+"""
+Workers en procesos separados para el cálculo de indicadores
+El snapshot de mercado se publica una vez por ciclo en memoria compartida
+y cada worker lo lee sin copiarlo (zero-copy), evitando el GIL.
+"""
+
+import os
+import logging
+import threading
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from indicators import KLINE_FIELDS, compute_indicators, klines_to_array
+from logging_config import reset_worker_logging
+
+logger = logging.getLogger(__name__)
+
+# Segmentos de memoria compartida ya abiertos dentro de cada worker
+_attached: Dict[str, shared_memory.SharedMemory] = {}
+
+
+class MarketSnapshot:
+    """Velas de hasta `capacity` pares en un único bloque de memoria compartida"""
+
+    def __init__(self, capacity: int, candles: int = 100):
+        self.pairs: List[str] = []
+        self.shape = (capacity, len(KLINE_FIELDS), candles)
+        size = int(np.prod(self.shape)) * np.dtype(np.float64).itemsize
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.array = np.ndarray(self.shape, dtype=np.float64, buffer=self.shm.buf)
+        self.lengths: Dict[str, int] = {}
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def publish(self, klines_by_pair: Dict[str, list]):
+        """Escribe las velas del ciclo actual (alineadas a la derecha), una fila por par"""
+        capacity, _, candles = self.shape
+        if len(klines_by_pair) > capacity:
+            logger.warning(f"⚠️ Snapshot lleno: {len(klines_by_pair) - capacity} pares sin indicadores")
+        self.pairs = list(klines_by_pair)[:capacity]
+        self.lengths = {}
+        for row, pair in enumerate(self.pairs):
+            klines = klines_by_pair[pair]
+            if not klines:
+                continue
+            klines = klines[-candles:]
+            self.array[row, :, candles - len(klines):] = klines_to_array(klines)
+            self.lengths[pair] = len(klines)
+
+    def close(self):
+        """Libera el bloque de memoria compartida"""
+        del self.array
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _ping(_: int) -> int:
+    return os.getpid()
+
+
+def _compute_from_snapshot(name: str, shape: Tuple[int, int, int], row: int, length: int) -> dict:
+    """Ejecutado en el worker: lee la fila `row` del snapshot y calcula indicadores"""
+    shm = _attached.get(name)
+    if shm is None:
+        shm = shared_memory.SharedMemory(name=name)
+        _attached[name] = shm
+    array = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    return compute_indicators(array[row, :, shape[2] - length:])
+
+
+class IndicatorPool:
+    """Pool de procesos que calcula los indicadores de cada par en paralelo"""
+
+    def __init__(self, capacity: int, workers: Optional[int] = None, candles: int = 100):
+        self.workers = workers or os.cpu_count() or 1
+        self.snapshot = MarketSnapshot(capacity, candles)
+        self.lock = threading.Lock()  # Un solo snapshot: un ciclo de cálculo a la vez
+        # fork: los workers heredan módulos ya importados (pandas, ta) y arrancan rápido
+        context = mp.get_context('fork') if 'fork' in mp.get_all_start_methods() else None
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=context, initializer=reset_worker_logging
+        )
+        # Lanzar los procesos ahora, antes de que existan otros hilos (logging, Telegram)
+        list(self.executor.map(_ping, range(self.workers)))
+        logger.info(f"🧵 Pool de indicadores iniciado: {self.workers} procesos")
+
+    def compute(self, klines_by_pair: Dict[str, list]) -> Dict[str, Optional[dict]]:
+        """Publica el snapshot y calcula los indicadores de todos los pares"""
+        with self.lock:
+            self.snapshot.publish(klines_by_pair)
+            futures = {
+                pair: self.executor.submit(
+                    _compute_from_snapshot, self.snapshot.name, self.snapshot.shape, row,
+                    self.snapshot.lengths[pair]
+                )
+                for row, pair in enumerate(self.snapshot.pairs)
+                if pair in self.snapshot.lengths
+            }
+
+            results: Dict[str, Optional[dict]] = {}
+            for pair, future in futures.items():
+                try:
+                    results[pair] = future.result()
+                except BrokenProcessPool:
+                    raise  # Un worker murió: el pool ya no acepta tareas (ver restart)
+                except Exception as e:
+                    logger.error(f"❌ Error calculando indicadores de {pair} en worker: {e}")
+                    results[pair] = None
+            return results
+
+    def restart(self):
+        """Reemplaza un executor roto (worker muerto por OOM/segfault)
+
+        Ya hay hilos vivos (logging, Telegram), así que los workers nuevos usan spawn
+        en lugar de fork: arrancan más lento pero sin heredar locks tomados.
+        """
+        with self.lock:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=mp.get_context('spawn'), initializer=reset_worker_logging
+            )
+        logger.warning(f"♻️ Pool de indicadores reiniciado: {self.workers} procesos")
+
+    def shutdown(self):
+        """Detiene los workers y libera la memoria compartida"""
+        self.executor.shutdown(wait=True)
+        self.snapshot.close()